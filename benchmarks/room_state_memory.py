@@ -0,0 +1,147 @@
+"""Compare the memory used per penguin by the room state layouts.
+
+- session: `x`, `y` and `action` keys in each socket.io session
+- records: one slotted record holding an `Action` model per player
+- columns: the array-backed `RoomState`
+
+`User` models and sids are shared by every layout and are left out.
+
+Usage:
+    python -m benchmarks.room_state_memory [--players 10,100,500]
+"""
+
+import argparse
+import gc
+import random
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from frostbite.core.room_state import RoomState
+from frostbite.models.action import Action
+from frostbite.models.avatar import Avatar
+from frostbite.models.user import User
+
+
+@dataclass(slots=True)
+class SlottedRecord:
+    sid: str
+    user: User
+    x: float
+    y: float
+    action: Action
+
+
+def make_user(player_id: int) -> User:
+    return User(
+        id=player_id,
+        username=f"penguin{player_id}",
+        nickname=f"Penguin {player_id}",
+        avatar=Avatar(
+            color=1,
+            head=0,
+            face=0,
+            neck=0,
+            body=0,
+            hand=0,
+            feet=0,
+            photo=0,
+            flag=0,
+            transformation=None,
+        ),
+        member=None,
+        igloo_id=0,
+        mascot_id=None,
+        relationship=None,
+        public_stampbook=False,
+        presence=None,
+    )
+
+
+def make_action(player_id: int) -> Action:
+    return Action(
+        player_id=player_id,
+        type=2,
+        x=random.uniform(300, 1400),
+        y=random.uniform(400, 900),
+        since=1_700_000_000_000.0 + random.random(),
+    )
+
+
+def build_sessions(players: list[tuple[str, User]]) -> Any:
+    return {
+        sid: {
+            "x": random.uniform(300, 1400),
+            "y": random.uniform(400, 900),
+            "action": make_action(user.id),
+        }
+        for sid, user in players
+    }
+
+
+def build_records(players: list[tuple[str, User]]) -> Any:
+    return {
+        sid: SlottedRecord(
+            sid,
+            user,
+            random.uniform(300, 1400),
+            random.uniform(400, 900),
+            make_action(user.id),
+        )
+        for sid, user in players
+    }
+
+
+def build_columns(players: list[tuple[str, User]]) -> Any:
+    state = RoomState("rooms:100", "/")
+    for sid, user in players:
+        state.add(
+            sid,
+            user,
+            x=random.uniform(300, 1400),
+            y=random.uniform(400, 900),
+            action=make_action(user.id),
+        )
+
+    return state
+
+
+def measure(
+    build: Callable[[list[tuple[str, User]]], Any], players: list[tuple[str, User]]
+) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        built = build(players)
+        gc.collect()
+        size = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+    del built
+    return size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", default="10,100,500")
+    args = parser.parse_args()
+
+    random.seed(0)
+    for count in map(int, args.players.split(",")):
+        players = [(f"sid{i:020}", make_user(i)) for i in range(1, count + 1)]
+
+        print(f"{count} players")
+        for label, build in (
+            ("session", build_sessions),
+            ("records", build_records),
+            ("columns", build_columns),
+        ):
+            size = measure(build, players)
+            print(f"  {label:<10} {size / count:>10.1f} bytes/penguin")
+        print()
+
+
+if __name__ == "__main__":
+    main()
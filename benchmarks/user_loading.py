@@ -0,0 +1,97 @@
+"""Compare loading users through the ORM with the lean row queries.
+
+- orm: full entities with bans, avatar, mascot and the decrypted email, as
+  world snapshots were loaded before `query_rows_by_ids`
+- orm deferred: `UserTable.query_by_ids`, the same without the email
+- rows: `UserTable.query_rows_by_ids`, the columns the world needs
+
+Each turns every user into the `User` model sent to rooms. Runs against the
+users already in the configured database.
+
+Usage:
+    python -m benchmarks.user_loading [--users 1,50,500] [--rounds 20]
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload, undefer
+
+from frostbite.database import ASYNC_ENGINE, ASYNC_SESSION
+from frostbite.database.schema.ban import BanTable
+from frostbite.database.schema.user import UserTable
+from frostbite.models.user import User
+
+
+async def query_by_ids_with_email(user_ids: list[int]) -> list[UserTable]:
+    async with ASYNC_SESSION() as session:
+        users_query = (
+            select(UserTable)
+            .options(
+                undefer(UserTable.email),
+                joinedload(UserTable.bans.and_(BanTable.ban_expire > datetime.now())),
+            )
+            .where(UserTable.id.in_(user_ids))
+        )
+
+        return list((await session.execute(users_query)).unique().scalars())
+
+
+async def bench(
+    label: str,
+    load: Callable[[list[int]], Awaitable[list[Any]]],
+    user_ids: list[int],
+    rounds: int,
+) -> float:
+    # warm the connection pool and the statement caches
+    await load(user_ids)
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for user in await load(user_ids):
+            await User.from_table(user)
+    seconds = time.perf_counter() - started
+
+    rate = len(user_ids) * rounds / seconds
+    print(f"  {label:<18} {rate:>10.0f} rows/s")
+    return rate
+
+
+async def run(users: list[int], rounds: int) -> None:
+    async with ASYNC_SESSION() as session:
+        ids_query = select(UserTable.id).order_by(UserTable.id).limit(max(users))
+        all_ids = list((await session.execute(ids_query)).scalars())
+
+    if not all_ids:
+        raise SystemExit("No users in the database")
+
+    for count in users:
+        user_ids = all_ids[:count]
+        print(f"{len(user_ids)} users per query")
+
+        orm = await bench("orm", query_by_ids_with_email, user_ids, rounds)
+        await bench("orm deferred", UserTable.query_by_ids, user_ids, rounds)
+        rows = await bench("rows", UserTable.query_rows_by_ids, user_ids, rounds)
+        print(f"  {'speedup':<18} {rows / orm:>10.2f}x")
+        print()
+
+    await ASYNC_ENGINE.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", default="1,50,500")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    # the engine logs every statement otherwise
+    ASYNC_ENGINE.echo = False
+    asyncio.run(run(list(map(int, args.users.split(","))), args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Compare the JSON and MessagePack wire formats on room:join rosters.
+
+Usage:
+    python -m benchmarks.wire_serialization [--players 10,50,100] [--rounds 2000]
+"""
+
+import argparse
+import random
+import timeit
+
+import msgpack
+from engineio import json
+
+from frostbite.core.wire import WirePacket
+from frostbite.core.wire_msgpack import MsgPackWirePacket
+from frostbite.handlers.room import RoomJoinResponse
+from frostbite.models.action import Action
+from frostbite.models.avatar import Avatar
+from frostbite.models.packet import Packet
+from frostbite.models.player import Player
+from frostbite.models.user import User
+
+
+def make_player(player_id: int) -> Player:
+    return Player(
+        user=User(
+            id=player_id,
+            username=f"penguin{player_id}",
+            nickname=f"Penguin {player_id}",
+            avatar=Avatar(
+                color=random.randint(1, 16),
+                head=random.randint(0, 2000),
+                face=random.randint(0, 2000),
+                neck=random.randint(0, 2000),
+                body=random.randint(0, 5000),
+                hand=random.randint(0, 5000),
+                feet=random.randint(0, 800),
+                photo=random.randint(0, 9000),
+                flag=random.randint(0, 600),
+                transformation=None,
+            ),
+            member=None,
+            igloo_id=0,
+            mascot_id=None,
+            relationship=None,
+            public_stampbook=False,
+            presence=None,
+        ),
+        x=random.uniform(300, 1400),
+        y=random.uniform(400, 900),
+        action=Action(
+            player_id=player_id,
+            type=random.randint(0, 7),
+            x=random.uniform(300, 1400),
+            y=random.uniform(400, 900),
+            since=1_700_000_000_000.0 + random.random(),
+        ),
+    )
+
+
+def make_packet(players: int) -> Packet:
+    return Packet(
+        op="room:join",
+        d=RoomJoinResponse(
+            room_id=100,
+            players=[make_player(i) for i in range(1, players + 1)],
+            waddles=[],
+        ),
+    )
+
+
+def bench(label: str, func, rounds: int) -> float:
+    seconds = timeit.timeit(func, number=rounds) / rounds
+    print(f"  {label:<18} {seconds * 1_000_000:>10.1f} us")
+    return seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", default="1,10,50,100")
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    random.seed(0)
+    for players in map(int, args.players.split(",")):
+        packet = make_packet(players)
+
+        json_payload = WirePacket.encode_payload(packet).payload
+        msgpack_payload = MsgPackWirePacket.encode_payload(packet).payload
+        assert isinstance(json_payload, str) and isinstance(msgpack_payload, bytes)
+
+        print(f"room:join with {players} players")
+        print(f"  {'json size':<18} {len(json_payload.encode()):>10} bytes")
+        print(f"  {'msgpack size':<18} {len(msgpack_payload):>10} bytes")
+
+        bench("json encode", lambda: WirePacket.encode_payload(packet), args.rounds)
+        bench(
+            "msgpack encode",
+            lambda: MsgPackWirePacket.encode_payload(packet),
+            args.rounds,
+        )
+        bench("json decode", lambda: json.loads(json_payload), args.rounds)
+        bench("msgpack decode", lambda: msgpack.unpackb(msgpack_payload), args.rounds)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import asyncio
+from typing import Iterable
+
+from loguru import logger
+from sqlalchemy import update
+
+from frostbite.core.config import AVATAR_FLUSH_INTERVAL
+from frostbite.database import ASYNC_SESSION
+from frostbite.database.schema.avatar import AvatarTable
+from frostbite.database.schema.user import UserRow
+
+__all__ = ("AvatarStore", "avatar_store")
+
+
+class AvatarStore:
+    """Write-behind store for avatar changes.
+
+    A change is applied to the cached user right away and written to the
+    database later. The changes of every user are written together every
+    `interval` seconds, in one multi-row UPDATE, and so are those of a user
+    when they disconnect and those of everyone on shutdown. Several changes
+    to the same avatar within an interval only write its latest state. With
+    an `interval` of 0, every change is written before `update` returns.
+
+    Durability: changes that are not written yet are lost if the process
+    dies without shutting down, at most `interval` seconds of them. A write
+    that fails is retried on the next flush, unless a newer change to the
+    same field came in since. Until it is written, other processes loading
+    the user from the database see the previous avatar, and users loaded
+    again by this process have their pending changes applied with `overlay`.
+    """
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        # user id to the avatar id and the fields it still has to write
+        self._pending: dict[int, tuple[int, dict[str, int]]] = {}
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def update(self, user: UserRow, fields: dict[str, int]) -> None:
+        for field, value in fields.items():
+            setattr(user.avatar, field, value)
+
+        _, pending = self._pending.setdefault(user.id, (user.avatar.id, {}))
+        pending.update(fields)
+
+        if self.interval <= 0:
+            await self.flush([user.id])
+        elif self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def overlay(self, user: UserRow) -> None:
+        """Apply the pending changes of a user freshly loaded from the
+        database."""
+        entry = self._pending.get(user.id)
+        if entry is None:
+            return
+
+        for field, value in entry[1].items():
+            setattr(user.avatar, field, value)
+
+    async def flush(self, user_ids: Iterable[int] | None = None) -> None:
+        """Write the pending changes of `user_ids`, or of every user."""
+        async with self._lock:
+            if user_ids is None:
+                pending, self._pending = self._pending, {}
+            else:
+                pending = {
+                    user_id: self._pending.pop(user_id)
+                    for user_id in user_ids
+                    if user_id in self._pending
+                }
+
+            if not pending:
+                return
+
+            rows = [
+                {"id": avatar_id, **fields} for avatar_id, fields in pending.values()
+            ]
+            try:
+                async with ASYNC_SESSION() as session:
+                    # executed as a single executemany, grouped by the set of
+                    # columns each row changes
+                    await session.execute(update(AvatarTable), rows)
+                    await session.commit()
+            except BaseException:
+                self._restore(pending)
+                raise
+
+    async def close(self) -> None:
+        """Stop the flush loop and write everything still pending."""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+        await self.flush()
+
+    def _restore(self, failed: dict[int, tuple[int, dict[str, int]]]) -> None:
+        for user_id, (avatar_id, fields) in failed.items():
+            _, pending = self._pending.setdefault(user_id, (avatar_id, {}))
+            # changes made since take precedence
+            for field, value in fields.items():
+                pending.setdefault(field, value)
+
+    async def _run(self) -> None:
+        try:
+            while self._pending:
+                await asyncio.sleep(self.interval)
+                try:
+                    await self.flush()
+                except Exception:
+                    logger.exception("Failed to write avatar changes, retrying")
+        finally:
+            self._task = None
+
+
+avatar_store = AvatarStore(AVATAR_FLUSH_INTERVAL)
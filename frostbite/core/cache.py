@@ -0,0 +1,198 @@
+import sys
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator
+
+__all__ = ("CacheStats", "LocalCache", "LocalCaches", "local_caches")
+
+MISSING: Any = object()
+
+
+@dataclass(slots=True)
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+
+@dataclass(slots=True)
+class CacheEntry:
+    value: Any
+    expires_at: float | None
+    size: int
+
+
+class LocalCache:
+    """Process-local LRU cache.
+
+    Entries are evicted least recently used first once the cache holds more
+    than `capacity` entries or, if `max_bytes` is set, more than `max_bytes`
+    bytes as measured by `sizeof`. Entries older than their TTL are dropped
+    when they are next looked up. Sizes are only computed when `max_bytes` is
+    set, `sys.getsizeof` does not follow references so it is a lower bound
+    for containers.
+    """
+
+    def __init__(
+        self,
+        *,
+        capacity: int | None = None,
+        ttl: float | None = None,
+        max_bytes: int | None = None,
+        sizeof: Callable[[Any], int] = sys.getsizeof,
+    ) -> None:
+        if capacity is not None and capacity < 1:
+            raise ValueError("Cache capacity must be at least 1")
+
+        self.capacity = capacity
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.stats = CacheStats()
+        self._sizeof = sizeof
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def contains(self, key: str) -> bool:
+        """Check for a live entry, without refreshing its recency."""
+        if self._lookup(key) is None:
+            self.stats.misses += 1
+            return False
+
+        return True
+
+    def get(self, key: str, default: Any = MISSING) -> Any:
+        entry = self._lookup(key)
+        if entry is None:
+            self.stats.misses += 1
+            if default is MISSING:
+                raise KeyError(key)
+            return default
+
+        self.stats.hits += 1
+        self._entries.move_to_end(key)
+        return entry.value
+
+    def set(self, key: str, value: Any, *, ttl: float | None = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        entry = CacheEntry(
+            value,
+            time.monotonic() + ttl if ttl is not None else None,
+            self._sizeof(value) if self.max_bytes is not None else 0,
+        )
+
+        self.delete(key)
+        self._entries[key] = entry
+        self.size += entry.size
+        self._evict()
+
+    def delete(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+
+        self.size -= entry.size
+        return True
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
+
+    def _lookup(self, key: str) -> CacheEntry | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        if entry.expires_at is not None and entry.expires_at <= time.monotonic():
+            self.delete(key)
+            self.stats.expirations += 1
+            return None
+
+        return entry
+
+    def _evict(self) -> None:
+        while self._entries and (
+            (self.capacity is not None and len(self._entries) > self.capacity)
+            or (self.max_bytes is not None and self.size > self.max_bytes)
+        ):
+            _, entry = self._entries.popitem(last=False)
+            self.size -= entry.size
+            self.stats.evictions += 1
+
+
+class LocalCaches:
+    """Named `LocalCache`s of this process."""
+
+    def __init__(self) -> None:
+        self._caches: dict[str, LocalCache] = {}
+
+    def get(
+        self,
+        name: str,
+        *,
+        capacity: int | None = None,
+        ttl: float | None = None,
+        max_bytes: int | None = None,
+    ) -> LocalCache:
+        cache = self._caches.get(name)
+        if cache is None:
+            cache = self._caches[name] = LocalCache(
+                capacity=capacity, ttl=ttl, max_bytes=max_bytes
+            )
+
+        return cache
+
+    def items(self) -> Iterator[tuple[str, LocalCache]]:
+        return iter(sorted(self._caches.items()))
+
+    def render_prometheus(self) -> str:
+        """Render the cache statistics in the Prometheus text exposition format."""
+        metrics = {
+            "frostbite_local_cache_entries": ("gauge", "Entries in a local cache."),
+            "frostbite_local_cache_bytes": ("gauge", "Tracked size of a local cache."),
+            "frostbite_local_cache_hits_total": ("counter", "Local cache hits."),
+            "frostbite_local_cache_misses_total": ("counter", "Local cache misses."),
+            "frostbite_local_cache_evictions_total": (
+                "counter",
+                "Entries evicted to stay within the cache limits.",
+            ),
+            "frostbite_local_cache_expirations_total": (
+                "counter",
+                "Entries dropped after their TTL.",
+            ),
+        }
+        lines = {
+            name: [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+            for name, (kind, help) in metrics.items()
+        }
+
+        for name, cache in self.items():
+            labels = f'{{cache="{name}"}}'
+            stats = cache.stats
+            lines["frostbite_local_cache_entries"].append(
+                f"frostbite_local_cache_entries{labels} {len(cache)}"
+            )
+            lines["frostbite_local_cache_bytes"].append(
+                f"frostbite_local_cache_bytes{labels} {cache.size}"
+            )
+            lines["frostbite_local_cache_hits_total"].append(
+                f"frostbite_local_cache_hits_total{labels} {stats.hits}"
+            )
+            lines["frostbite_local_cache_misses_total"].append(
+                f"frostbite_local_cache_misses_total{labels} {stats.misses}"
+            )
+            lines["frostbite_local_cache_evictions_total"].append(
+                f"frostbite_local_cache_evictions_total{labels} {stats.evictions}"
+            )
+            lines["frostbite_local_cache_expirations_total"].append(
+                f"frostbite_local_cache_expirations_total{labels} {stats.expirations}"
+            )
+
+        return "\n".join(line for group in lines.values() for line in group) + "\n"
+
+
+local_caches = LocalCaches()
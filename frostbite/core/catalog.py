@@ -0,0 +1,258 @@
+import dataclasses
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Mapping
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from frostbite.core.constants.item import ItemType
+from frostbite.core.constants.stamps import StampRank
+from frostbite.database import Base
+from frostbite.database.schema import (
+    CardTable,
+    FurnitureTable,
+    IglooTable,
+    ItemTable,
+    JokeTable,
+    PuffleItemTable,
+    RoomTable,
+    StampTable,
+    TourMessagesTable,
+)
+
+__all__ = (
+    "Catalog",
+    "CatalogItem",
+    "CatalogRoom",
+    "CatalogFurniture",
+    "CatalogIgloo",
+    "CatalogPuffleItem",
+    "CatalogCard",
+    "CatalogStamp",
+    "load_catalog",
+    "set_catalog",
+    "get_catalog",
+)
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogItem:
+    id: int
+    name: str
+    type: int
+    cost: int
+    layer: int
+    member: bool
+    bait: bool
+    epf: bool
+    tour: bool
+    treasure: bool
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogRoom:
+    id: int
+    key: str
+    name: str
+    short_name: str
+    display_name: str
+    path: str
+    spawn: bool
+    member: bool
+    jump_enabled: bool
+    music_id: int
+    max_users: int
+    required_item: int | None
+    safe_start_x: int
+    safe_end_x: int
+    safe_start_y: int
+    safe_end_y: int
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogFurniture:
+    id: int
+    name: str
+    type: int
+    sort: int
+    cost: int
+    member: bool
+    bait: bool
+    max_quantity: int
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogIgloo:
+    id: int
+    name: str
+    cost: int
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogPuffleItem:
+    id: int
+    name: str
+    path: str
+    cost: int
+    quantity: int
+    member: bool
+    play_external: str
+    consumption: str
+    class_name: str
+    root_item_id: int
+    only_purchase: bool
+    effect_food: int
+    effect_rest: int
+    effect_play: int
+    effect_clean: int
+    reaction: tuple[int, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogCard:
+    id: int
+    name: str
+    description: str
+    set_id: int
+    power_id: int
+    element: int
+    color: str
+    value: int
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogStamp:
+    id: int
+    collection_id: int
+    name: str
+    member: bool
+    rank: StampRank
+    description: str
+
+
+@dataclass(frozen=True, slots=True)
+class Catalog:
+    """The static game data of the world, indexed by id.
+
+    Loaded once at startup and never changed afterwards, changes to the
+    tables need a restart. Every mapping is read-only, either a dict held by
+    this process or a table of a mapped snapshot, see
+    frostbite.core.catalog_snapshot.
+    """
+
+    items: Mapping[int, CatalogItem]
+    rooms: Mapping[int, CatalogRoom]
+    furniture: Mapping[int, CatalogFurniture]
+    igloos: Mapping[int, CatalogIgloo]
+    puffle_items: Mapping[int, CatalogPuffleItem]
+    cards: Mapping[int, CatalogCard]
+    stamps: Mapping[int, CatalogStamp]
+    jokes: Mapping[int, str]
+    tour_messages: Mapping[str, str]
+    items_by_type: Mapping[int, frozenset[int]]
+    rooms_by_key: Mapping[str, CatalogRoom]
+    spawn_rooms: tuple[int, ...]
+
+    @classmethod
+    def build(
+        cls,
+        *,
+        items: Mapping[int, CatalogItem],
+        rooms: Mapping[int, CatalogRoom],
+        furniture: Mapping[int, CatalogFurniture],
+        igloos: Mapping[int, CatalogIgloo],
+        puffle_items: Mapping[int, CatalogPuffleItem],
+        cards: Mapping[int, CatalogCard],
+        stamps: Mapping[int, CatalogStamp],
+        jokes: Mapping[int, str],
+        tour_messages: Mapping[str, str],
+        items_by_type: Mapping[int, frozenset[int]] | None = None,
+    ) -> "Catalog":
+        """Build a catalog and its secondary indexes.
+
+        Dicts are copied, any other mapping is taken to be read-only already
+        and kept as is. `items_by_type` is computed from `items` unless given.
+        """
+        if items_by_type is None:
+            by_type: dict[int, set[int]] = {}
+            for item in items.values():
+                by_type.setdefault(item.type, set()).add(item.id)
+
+            items_by_type = {kind: frozenset(ids) for kind, ids in by_type.items()}
+
+        return cls(
+            items=_read_only(items),
+            rooms=_read_only(rooms),
+            furniture=_read_only(furniture),
+            igloos=_read_only(igloos),
+            puffle_items=_read_only(puffle_items),
+            cards=_read_only(cards),
+            stamps=_read_only(stamps),
+            jokes=_read_only(jokes),
+            tour_messages=_read_only(tour_messages),
+            items_by_type=_read_only(items_by_type),
+            rooms_by_key=MappingProxyType({room.key: room for room in rooms.values()}),
+            spawn_rooms=tuple(sorted(room.id for room in rooms.values() if room.spawn)),
+        )
+
+    @property
+    def colors(self) -> frozenset[int]:
+        return self.items_by_type.get(ItemType.COLOR, frozenset())
+
+    def has_item(self, item_id: int, item_type: ItemType | None = None) -> bool:
+        item = self.items.get(item_id)
+        return item is not None and (item_type is None or item.type == item_type)
+
+
+def _read_only[K, V](mapping: Mapping[K, V]) -> Mapping[K, V]:
+    if isinstance(mapping, dict):
+        return MappingProxyType(dict(mapping))
+
+    return mapping
+
+
+async def _load_records[R](
+    session: AsyncSession, table: type[Base], record: type[R]
+) -> dict[Any, R]:
+    # only select the columns of the record, without building ORM instances
+    columns = [getattr(table, field.name) for field in dataclasses.fields(record)]  # type: ignore[arg-type]
+    result = await session.execute(select(*columns))
+
+    records: dict[Any, R] = {}
+    for row in result:
+        values = (tuple(v) if isinstance(v, list) else v for v in row)
+        records[row[0]] = record(*values)
+
+    return records
+
+
+async def load_catalog(session: AsyncSession) -> Catalog:
+    jokes = await session.execute(select(JokeTable.id, JokeTable.text))
+    tour_messages = await session.execute(
+        select(TourMessagesTable.key, TourMessagesTable.message)
+    )
+
+    return Catalog.build(
+        items=await _load_records(session, ItemTable, CatalogItem),
+        rooms=await _load_records(session, RoomTable, CatalogRoom),
+        furniture=await _load_records(session, FurnitureTable, CatalogFurniture),
+        igloos=await _load_records(session, IglooTable, CatalogIgloo),
+        puffle_items=await _load_records(session, PuffleItemTable, CatalogPuffleItem),
+        cards=await _load_records(session, CardTable, CatalogCard),
+        stamps=await _load_records(session, StampTable, CatalogStamp),
+        jokes={id: text for id, text in jokes},
+        tour_messages={key: message for key, message in tour_messages},
+    )
+
+
+CATALOG: Catalog
+
+
+def set_catalog(catalog: Catalog) -> None:
+    global CATALOG
+    CATALOG = catalog
+
+
+def get_catalog() -> Catalog:
+    return CATALOG
@@ -0,0 +1,583 @@
+"""Binary snapshots of the game catalog.
+
+A snapshot holds every catalog table, along with the row count and the
+latest `updated_timestamp` of each table when it was written. Workers map
+the file read-only for as long as they run and serve the catalog straight
+from it, decoding a record each time it is looked up. The tables are never
+copied into the worker, so every worker on a host shares the same pages
+through the page cache. A single aggregate query tells whether the
+snapshot is still current.
+
+Build one with:
+
+    python -m frostbite.core.catalog_snapshot [path]
+
+Rows edited without bumping `updated_timestamp`, e.g. by hand in SQL, are
+not noticed, rebuild the snapshot after such edits.
+"""
+
+import asyncio
+import dataclasses
+import mmap
+import os
+import struct
+import sys
+from enum import Enum
+from typing import Any, Callable, Iterable, Iterator, Mapping, get_type_hints
+
+from loguru import logger
+from sqlalchemy import String, func, literal, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from frostbite.core.catalog import (
+    Catalog,
+    CatalogCard,
+    CatalogFurniture,
+    CatalogIgloo,
+    CatalogItem,
+    CatalogPuffleItem,
+    CatalogRoom,
+    CatalogStamp,
+    load_catalog,
+)
+from frostbite.database import Base
+from frostbite.database.schema import (
+    CardTable,
+    FurnitureTable,
+    IglooTable,
+    ItemTable,
+    JokeTable,
+    PuffleItemTable,
+    RoomTable,
+    StampTable,
+    TourMessagesTable,
+)
+
+__all__ = (
+    "SnapshotError",
+    "MappedTable",
+    "GroupIndex",
+    "get_catalog_versions",
+    "write_snapshot",
+    "read_snapshot",
+    "load_catalog_snapshot",
+)
+
+MAGIC = b"FBCATLG"
+FORMAT_VERSION = 2
+
+type Versions = dict[str, tuple[int, str | None]]
+
+_TABLES: dict[str, tuple[type[Base], type | None]] = {
+    "items": (ItemTable, CatalogItem),
+    "rooms": (RoomTable, CatalogRoom),
+    "furniture": (FurnitureTable, CatalogFurniture),
+    "igloos": (IglooTable, CatalogIgloo),
+    "puffle_items": (PuffleItemTable, CatalogPuffleItem),
+    "cards": (CardTable, CatalogCard),
+    "stamps": (StampTable, CatalogStamp),
+    "jokes": (JokeTable, None),
+    "tour_messages": (TourMessagesTable, None),
+}
+
+# tags of single values
+_NONE, _FALSE, _TRUE, _INT, _STR, _TUPLE = range(6)
+# kinds of table columns, each stored packed so that any row can be read
+# without going through the previous ones
+_BOOLS, _INTS, _NULLABLE_INTS, _STRS, _VALUES = range(5)
+# struct codes of the integer widths, with their exclusive bound
+_INT_CODES = (("b", 1 << 7), ("h", 1 << 15), ("i", 1 << 31), ("q", 1 << 63))
+
+_U8 = struct.Struct("<B")
+_U16 = struct.Struct("<H")
+_U32 = struct.Struct("<I")
+_I64 = struct.Struct("<q")
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def _columns(name: str) -> tuple[str, ...]:
+    _, record = _TABLES[name]
+    if record is None:
+        # plain id to text mappings
+        return ("key", "value")
+
+    return tuple(field.name for field in dataclasses.fields(record))
+
+
+def _rows(catalog: Catalog, name: str) -> list[tuple[Any, ...]]:
+    table: Mapping[Any, Any] = getattr(catalog, name)
+    if _TABLES[name][1] is None:
+        rows: Iterable[tuple[Any, ...]] = table.items()
+    else:
+        rows = (dataclasses.astuple(record) for record in table.values())
+
+    # sorted by key, so that lookups can search the mapped key column
+    return sorted(rows, key=lambda row: row[0])
+
+
+def _write_value(out: bytearray, value: Any) -> None:
+    if value is None:
+        out += _U8.pack(_NONE)
+    elif value is True or value is False:
+        out += _U8.pack(_TRUE if value else _FALSE)
+    elif isinstance(value, int):
+        out += _U8.pack(_INT)
+        out += _I64.pack(value)
+    elif isinstance(value, str):
+        data = value.encode()
+        out += _U8.pack(_STR)
+        out += _U32.pack(len(data))
+        out += data
+    elif isinstance(value, (tuple, list)):
+        out += _U8.pack(_TUPLE)
+        out += _U32.pack(len(value))
+        for item in value:
+            _write_value(out, item)
+    else:
+        raise SnapshotError(f"Cannot store {type(value).__name__} in a snapshot")
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _write_ints(out: bytearray, values: list[int]) -> None:
+    # the narrowest width that fits the whole column
+    low, high = min(values, default=0), max(values, default=0)
+    code = next(c for c, limit in _INT_CODES if -limit <= low and high < limit)
+    out += code.encode()
+    out += struct.pack(f"<{len(values)}{code}", *values)
+
+
+def _write_column(out: bytearray, values: list[Any]) -> None:
+    count = len(values)
+    if all(value is True or value is False for value in values):
+        out += _U8.pack(_BOOLS)
+        out += bytes(values)
+    elif all(_is_int(value) for value in values):
+        out += _U8.pack(_INTS)
+        _write_ints(out, values)
+    elif all(value is None or _is_int(value) for value in values):
+        out += _U8.pack(_NULLABLE_INTS)
+        out += bytes(value is not None for value in values)
+        _write_ints(out, [value or 0 for value in values])
+    elif all(isinstance(value, str) for value in values):
+        out += _U8.pack(_STRS)
+        _write_chunks(out, [value.encode() for value in values])
+    else:
+        chunks = []
+        for value in values:
+            chunk = bytearray()
+            _write_value(chunk, value)
+            chunks.append(chunk)
+
+        out += _U8.pack(_VALUES)
+        _write_chunks(out, chunks)
+
+
+def _write_chunks(out: bytearray, chunks: list[bytes] | list[bytearray]) -> None:
+    # an offsets table, followed by every chunk back to back
+    offsets = [0]
+    for chunk in chunks:
+        offsets.append(offsets[-1] + len(chunk))
+
+    out += struct.pack(f"<{len(chunks) + 1}I", *offsets)
+    out += b"".join(chunks)
+
+
+class _Reader:
+    def __init__(self, buffer: memoryview, offset: int = 0) -> None:
+        self.buffer = buffer
+        self.offset = offset
+
+    def unpack(self, fmt: struct.Struct) -> Any:
+        try:
+            (value,) = fmt.unpack_from(self.buffer, self.offset)
+        except struct.error as e:
+            raise SnapshotError("Truncated snapshot") from e
+
+        self.offset += fmt.size
+        return value
+
+    def skip(self, size: int) -> int:
+        """Move past `size` bytes, returning the offset they start at."""
+        start, end = self.offset, self.offset + size
+        if end > len(self.buffer):
+            raise SnapshotError("Truncated snapshot")
+
+        self.offset = end
+        return start
+
+    def bytes(self, size: int) -> bytes:
+        start = self.skip(size)
+        return self.buffer[start : self.offset].tobytes()
+
+    def column(self, count: int) -> Callable[[int], Any]:
+        """Map a column of `count` rows, returns a getter of each row."""
+        buffer = self.buffer
+        kind = self.unpack(_U8)
+        if kind == _BOOLS:
+            bools = self.skip(count)
+            return lambda row: buffer[bools + row] != 0
+        if kind == _INTS:
+            return self.ints(count)
+        if kind == _NULLABLE_INTS:
+            present = self.skip(count)
+            ints = self.ints(count)
+            return lambda row: ints(row) if buffer[present + row] else None
+        if kind in (_STRS, _VALUES):
+            offsets = self.skip((count + 1) * _U32.size)
+            (size,) = _U32.unpack_from(buffer, offsets + count * _U32.size)
+            data = self.skip(size)
+            bounds = struct.Struct("<2I")
+
+            if kind == _STRS:
+
+                def get_str(row: int) -> str:
+                    start, end = bounds.unpack_from(buffer, offsets + row * 4)
+                    return str(buffer[data + start : data + end], "utf-8")
+
+                return get_str
+
+            def get_value(row: int) -> Any:
+                start, _ = bounds.unpack_from(buffer, offsets + row * 4)
+                return _Reader(buffer, data + start).value()
+
+            return get_value
+
+        raise SnapshotError(f"Unknown column kind {kind}")
+
+    def ints(self, count: int) -> Callable[[int], int]:
+        code = self.bytes(1).decode()
+        if code not in "bhiq":
+            raise SnapshotError(f"Unknown integer width {code}")
+
+        buffer = self.buffer
+        fmt = struct.Struct(f"<{code}")
+        start = self.skip(count * fmt.size)
+        return lambda row: fmt.unpack_from(buffer, start + row * fmt.size)[0]
+
+    def value(self) -> Any:
+        tag = self.unpack(_U8)
+        if tag == _NONE:
+            return None
+        if tag == _FALSE:
+            return False
+        if tag == _TRUE:
+            return True
+        if tag == _INT:
+            return self.unpack(_I64)
+        if tag == _STR:
+            return self.bytes(self.unpack(_U32)).decode()
+        if tag == _TUPLE:
+            return tuple(self.value() for _ in range(self.unpack(_U32)))
+
+        raise SnapshotError(f"Unknown value tag {tag}")
+
+
+class MappedTable(Mapping[Any, Any]):
+    """A catalog table served from a mapped snapshot.
+
+    Rows are stored sorted by key, so a lookup is a binary search over the
+    key column. Records are decoded on every access, nothing is kept.
+    """
+
+    __slots__ = ("_count", "_columns", "_decode")
+
+    def __init__(
+        self,
+        count: int,
+        columns: list[Callable[[int], Any]],
+        decode: Callable[[int], Any],
+    ) -> None:
+        self._count = count
+        self._columns = columns
+        self._decode = decode
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[Any]:
+        return map(self._columns[0], range(self._count))
+
+    def __contains__(self, key: object) -> bool:
+        return self._find(key) is not None
+
+    def __getitem__(self, key: Any) -> Any:
+        row = self._find(key)
+        if row is None:
+            raise KeyError(key)
+
+        return self._decode(row)
+
+    def column(self, index: int) -> Iterator[Any]:
+        """The values of one column, without decoding whole records."""
+        return map(self._columns[index], range(self._count))
+
+    def _find(self, key: Any) -> int | None:
+        get_key = self._columns[0]
+        low, high = 0, self._count
+        try:
+            while low < high:
+                middle = (low + high) // 2
+                if get_key(middle) < key:
+                    low = middle + 1
+                else:
+                    high = middle
+        except TypeError:
+            # not even comparable with the keys of this table
+            return None
+
+        if low < self._count and get_key(low) == key:
+            return low
+
+        return None
+
+
+class GroupIndex(Mapping[Any, frozenset[Any]]):
+    """Keys of a mapped table grouped by the value of one of its columns,
+    computed the first time each group is asked for."""
+
+    __slots__ = ("_table", "_column", "_groups", "_values")
+
+    def __init__(self, table: MappedTable, column: int) -> None:
+        self._table = table
+        self._column = column
+        self._groups: dict[Any, frozenset[Any]] = {}
+        self._values: frozenset[Any] | None = None
+
+    def __len__(self) -> int:
+        return len(self._distinct())
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._distinct())
+
+    def __getitem__(self, value: Any) -> frozenset[Any]:
+        group = self._groups.get(value)
+        if group is None:
+            if value not in self._distinct():
+                raise KeyError(value)
+
+            keys = zip(self._table, self._table.column(self._column))
+            group = self._groups[value] = frozenset(
+                key for key, other in keys if other == value
+            )
+
+        return group
+
+    def _distinct(self) -> frozenset[Any]:
+        if self._values is None:
+            self._values = frozenset(self._table.column(self._column))
+
+        return self._values
+
+
+def _write_header(out: bytearray, versions: Versions) -> None:
+    out += MAGIC
+    out += _U16.pack(FORMAT_VERSION)
+    out += _U16.pack(len(versions))
+    for name, (count, updated) in versions.items():
+        _write_value(out, name)
+        _write_value(out, count)
+        _write_value(out, updated)
+
+
+def _read_header(reader: _Reader) -> Versions:
+    if reader.bytes(len(MAGIC)) != MAGIC:
+        raise SnapshotError("Not a catalog snapshot")
+
+    version = reader.unpack(_U16)
+    if version != FORMAT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot format {version}")
+
+    versions: Versions = {}
+    for _ in range(reader.unpack(_U16)):
+        name = reader.value()
+        versions[name] = (reader.value(), reader.value())
+
+    return versions
+
+
+def _converters(record: type) -> list[Callable[[Any], Any] | None]:
+    # enums are stored by value
+    hints = get_type_hints(record)
+    converters: list[Callable[[Any], Any] | None] = []
+    for field in dataclasses.fields(record):
+        hint = hints[field.name]
+        if isinstance(hint, type) and issubclass(hint, Enum):
+            converters.append(hint)
+        else:
+            converters.append(None)
+
+    return converters
+
+
+def _decoder(
+    record: type | None, columns: list[Callable[[int], Any]]
+) -> Callable[[int], Any]:
+    if record is None:
+        # plain key to text mappings
+        return columns[1]
+
+    getters = [
+        column if convert is None else (lambda row, c=column, f=convert: f(c(row)))
+        for column, convert in zip(columns, _converters(record))
+    ]
+    return lambda row: record(*(get(row) for get in getters))
+
+
+def _map_tables(reader: _Reader) -> dict[str, MappedTable]:
+    tables: dict[str, MappedTable] = {}
+    for _ in range(reader.unpack(_U16)):
+        name = reader.value()
+        columns = tuple(reader.value() for _ in range(reader.unpack(_U16)))
+        if name not in _TABLES or columns != _columns(name):
+            raise SnapshotError(f"Snapshot table {name} does not match the schema")
+
+        count = reader.unpack(_U32)
+        getters = [reader.column(count) for _ in columns]
+        tables[name] = MappedTable(count, getters, _decoder(_TABLES[name][1], getters))
+
+    return tables
+
+
+async def get_catalog_versions(session: AsyncSession) -> Versions:
+    """Get the row count and latest update of every catalog table at once."""
+    query = union_all(
+        *(
+            select(
+                literal(name, String), func.count(), func.max(table.updated_timestamp)
+            )
+            for name, (table, _) in _TABLES.items()
+        )
+    )
+    result = await session.execute(query)
+
+    versions: Versions = {}
+    for name, count, updated in result:
+        versions[name] = (count, updated.isoformat() if updated is not None else None)
+
+    return {name: versions[name] for name in _TABLES}
+
+
+def write_snapshot(path: str, catalog: Catalog, versions: Versions) -> None:
+    """Write a snapshot of `catalog` taken at `versions`.
+
+    The file is replaced atomically, so workers reading the previous one are
+    not affected.
+    """
+    out = bytearray()
+    _write_header(out, versions)
+
+    out += _U16.pack(len(_TABLES))
+    for name in _TABLES:
+        columns = _columns(name)
+        rows = _rows(catalog, name)
+
+        _write_value(out, name)
+        out += _U16.pack(len(columns))
+        for column in columns:
+            _write_value(out, column)
+
+        out += _U32.pack(len(rows))
+        for values in zip(*rows) if rows else ([] for _ in columns):
+            _write_column(out, list(values))
+
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            f.write(out)
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+
+def read_snapshot(path: str, versions: Versions | None = None) -> Catalog | None:
+    """Map the snapshot at `path` and serve a catalog from it.
+
+    The file stays mapped for as long as the catalog is referenced. Replacing
+    it on disk does not affect the catalogs already served from it.
+
+    Returns None without mapping the tables if the snapshot was not taken
+    at `versions`.
+    """
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    buffer = memoryview(mapped)
+    try:
+        reader = _Reader(buffer)
+        if _read_header(reader) != versions and versions is not None:
+            buffer.release()
+            mapped.close()
+            return None
+
+        tables = _map_tables(reader)
+    except BaseException:
+        buffer.release()
+        mapped.close()
+        raise
+
+    return Catalog.build(
+        **tables,
+        # items are grouped by their `type` column without decoding them
+        items_by_type=GroupIndex(tables["items"], _columns("items").index("type")),
+    )
+
+
+async def load_catalog_snapshot(session: AsyncSession, path: str) -> Catalog:
+    """Load the catalog from the snapshot at `path`, or from the database if
+    the snapshot is missing, invalid or stale.
+
+    A snapshot is written afresh after falling back to the database, for
+    the next worker to use.
+    """
+    versions = await get_catalog_versions(session)
+
+    try:
+        catalog = read_snapshot(path, versions)
+    except FileNotFoundError:
+        logger.info(f"No catalog snapshot at {path}")
+    except (OSError, TypeError, ValueError, SnapshotError) as e:
+        logger.warning(f"Cannot read catalog snapshot {path}: {e}")
+    else:
+        if catalog is not None:
+            logger.info(f"Loaded catalog snapshot {path}")
+            return catalog
+
+        logger.info(f"Catalog snapshot {path} is stale")
+
+    catalog = await load_catalog(session)
+    try:
+        write_snapshot(path, catalog, versions)
+    except (OSError, SnapshotError) as e:
+        logger.warning(f"Cannot write catalog snapshot {path}: {e}")
+
+    return catalog
+
+
+async def build(path: str) -> None:
+    from frostbite.database import ASYNC_ENGINE, ASYNC_SESSION
+
+    async with ASYNC_SESSION() as session:
+        versions = await get_catalog_versions(session)
+        catalog = await load_catalog(session)
+
+    write_snapshot(path, catalog, versions)
+    await ASYNC_ENGINE.dispose()
+
+
+if __name__ == "__main__":
+    from frostbite.core.config import CATALOG_SNAPSHOT_PATH
+
+    path = sys.argv[1] if len(sys.argv) > 1 else CATALOG_SNAPSHOT_PATH
+    if path is None:
+        sys.exit("usage: python -m frostbite.core.catalog_snapshot <path>")
+
+    asyncio.run(build(path))
+    print(f"Wrote catalog snapshot to {path}")
@@ -5,7 +5,10 @@ from starlette.config import Config
 from starlette.datastructures import CommaSeparatedStrings, Secret
 
 from frostbite.core.logging import InterceptHandler
+from frostbite.core.constants.mailbox import MailboxOverflowPolicy
+from frostbite.core.constants.realtime import RealtimeBackend
 from frostbite.core.constants.token import JWTTokenType
+from frostbite.core.constants.wire import WireSerializer
 
 config = Config(".env")
 
@@ -74,6 +77,17 @@ REDIS_USER = config("REDIS_USER", cast=str, default="default")
 REDIS_PASSWORD = config("REDIS_PASSWORD", cast=Secret, default=None)
 REDIS_SSL_REQUIRED = config("REDIS_SSL_REQUIRED", cast=bool, default=False)
 REDIS_SIO_DB = config("REDIS_SIO_DB", cast=int, default=0)
+REDIS_SIO_CHANNEL = config("REDIS_SIO_CHANNEL", cast=str, default="socketio")
+REDIS_SIO_SHARDS = config("REDIS_SIO_SHARDS", cast=int, default=0)
+# Send the entity cache commands issued in the same event loop iteration in
+# one pipeline
+REDIS_AUTO_BATCH = config("REDIS_AUTO_BATCH", cast=bool, default=False)
+
+# Use `memory` to run a single worker world without Redis, socket.io emits
+# and entities then stay within the process
+REALTIME_BACKEND = config(
+    "REALTIME_BACKEND", cast=RealtimeBackend, default=RealtimeBackend.REDIS
+)
 
 REDIS_URL = config(
     "REDIS_URL",
@@ -95,10 +109,61 @@ FASTAPI_EVENTS_MIDDLEWARE_ID = config(
 ENVIRONMENT_TYPE = config("ENVIRONMENT_TYPE", cast=str, default="dev")
 IS_DEVELOPMENT_MODE = ENVIRONMENT_TYPE == "dev"
 
+# Default number of entries each process-local entity cache holds
+LOCAL_CACHE_CAPACITY = config("LOCAL_CACHE_CAPACITY", cast=int, default=10_000)
+
+# Metrics
+METRICS_ENABLED = config("METRICS_ENABLED", cast=bool, default=True)
+METRICS_PATH = config("METRICS_PATH", cast=str, default="/metrics")
+
 # World
 WORLD_ID = config("WORLD_ID", cast=int, default=0)
 DEFAULT_WORLD_NAMESPACE = config("DEFAULT_WORLD_NAMESPACE", cast=str, default="/")
 
+# Catalog snapshot mapped and shared by the workers, see
+# frostbite.core.catalog_snapshot
+CATALOG_SNAPSHOT_PATH = config("CATALOG_SNAPSHOT_PATH", cast=str, default=None)
+
+# Wire protocol, both for clients and the socket.io pub/sub channel
+SOCKET_SERIALIZER = config(
+    "SOCKET_SERIALIZER", cast=WireSerializer, default=WireSerializer.JSON
+)
+
+# Rate at which player actions are batched per room, in Hz. Use 0 to
+# broadcast every action as soon as it is received.
+ACTION_TICK_RATE = config("ACTION_TICK_RATE", cast=float, default=0)
+
+# Rate at which player positions are written to the room rosters shared with
+# other workers, in Hz. Use 0 to write every change as soon as it is received.
+ROSTER_SYNC_RATE = config("ROSTER_SYNC_RATE", cast=float, default=2)
+
+# Area of interest, movement and emotes in rooms with at least AOI_MIN_PLAYERS
+# players only reach players within AOI_VIEW_RADIUS cells. Use 0 to disable.
+# Only applies with the `memory` realtime backend, where a single worker holds
+# every player of a room.
+AOI_MIN_PLAYERS = config("AOI_MIN_PLAYERS", cast=int, default=0)
+AOI_CELL_SIZE = config("AOI_CELL_SIZE", cast=float, default=380)
+AOI_VIEW_RADIUS = config("AOI_VIEW_RADIUS", cast=int, default=1)
+
+# How often the room occupancy used to pick spawn rooms is read from Redis,
+# in seconds
+ROOM_OCCUPANCY_REFRESH = config("ROOM_OCCUPANCY_REFRESH", cast=float, default=1)
+# Rooms past their max_users are split in instances, up to this many per
+# room. Use 0 for no limit, or 1 to turn full rooms away instead.
+ROOM_MAX_INSTANCES = config("ROOM_MAX_INSTANCES", cast=int, default=0)
+
+# Avatar changes are written to the database this often, in seconds. Up to
+# this much of them is lost if a worker dies, use 0 to write them at once.
+AVATAR_FLUSH_INTERVAL = config("AVATAR_FLUSH_INTERVAL", cast=float, default=5)
+
+# Packet mailboxes
+PACKET_MAILBOX_DEPTH = config("PACKET_MAILBOX_DEPTH", cast=int, default=64)
+PACKET_MAILBOX_OVERFLOW = config(
+    "PACKET_MAILBOX_OVERFLOW",
+    cast=MailboxOverflowPolicy,
+    default=MailboxOverflowPolicy.DROP_VOLATILE,
+)
+
 logging.getLogger().handlers = [InterceptHandler()]
 LOGGERS = ("uvicorn.asgi", "uvicorn.access")
 for logger_name in LOGGERS:
@@ -0,0 +1,14 @@
+from enum import IntEnum
+
+
+class ItemType(IntEnum):
+    COLOR = 1
+    HEAD = 2
+    FACE = 3
+    NECK = 4
+    BODY = 5
+    HAND = 6
+    FEET = 7
+    FLAG = 8
+    PHOTO = 9
+    AWARD = 10
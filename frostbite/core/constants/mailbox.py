@@ -0,0 +1,7 @@
+from enum import Enum
+
+
+class MailboxOverflowPolicy(Enum):
+    DROP_VOLATILE = "drop_volatile"
+    DISCONNECT = "disconnect"
+    REJECT = "reject"
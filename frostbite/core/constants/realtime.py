@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class RealtimeBackend(Enum):
+    REDIS = "redis"
+    MEMORY = "memory"
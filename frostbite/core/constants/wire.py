@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class WireSerializer(Enum):
+    JSON = "json"
+    MSGPACK = "msgpack"
@@ -0,0 +1,166 @@
+from frostbite.core.config import (
+    AOI_CELL_SIZE,
+    AOI_MIN_PLAYERS,
+    AOI_VIEW_RADIUS,
+    REALTIME_BACKEND,
+)
+from frostbite.core.constants.realtime import RealtimeBackend
+
+__all__ = ("InterestGrid", "AreaOfInterest", "area_of_interest")
+
+type Cell = tuple[int, int]
+
+
+class InterestGrid:
+    """Uniform grid of the players in a room, keyed by sid."""
+
+    __slots__ = ("cell_size", "_cells", "_players")
+
+    def __init__(self, cell_size: float) -> None:
+        self.cell_size = cell_size
+        self._cells: dict[Cell, set[str]] = {}
+        self._players: dict[str, Cell] = {}
+
+    def __len__(self) -> int:
+        return len(self._players)
+
+    def cell_of(self, x: float, y: float) -> Cell:
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def get(self, sid: str) -> Cell | None:
+        return self._players.get(sid)
+
+    def move(self, sid: str, x: float, y: float) -> tuple[Cell | None, Cell]:
+        """Move a player, returns their previous and current cell."""
+        cell = self.cell_of(x, y)
+        previous = self._players.get(sid)
+        if previous == cell:
+            return previous, cell
+
+        if previous is not None:
+            self._discard(sid, previous)
+
+        self._players[sid] = cell
+        self._cells.setdefault(cell, set()).add(sid)
+        return previous, cell
+
+    def remove(self, sid: str) -> None:
+        cell = self._players.pop(sid, None)
+        if cell is not None:
+            self._discard(sid, cell)
+
+    def around(self, cell: Cell, radius: int) -> set[str]:
+        """Every player within `radius` cells of `cell`."""
+        cx, cy = cell
+        sids: set[str] = set()
+        for x in range(cx - radius, cx + radius + 1):
+            for y in range(cy - radius, cy + radius + 1):
+                sids.update(self._cells.get((x, y), ()))
+
+        return sids
+
+    def _discard(self, sid: str, cell: Cell) -> None:
+        sids = self._cells[cell]
+        sids.discard(sid)
+        if not sids:
+            del self._cells[cell]
+
+
+class AreaOfInterest:
+    """Tracks where players stand, so that local broadcasts like movement and
+    emotes only reach the players that can see them.
+
+    Filtering only kicks in for rooms with at least `min_players` players,
+    smaller rooms always get full-room broadcasts. A `min_players` of 0
+    disables filtering entirely.
+
+    The grids only hold the players connected to this process, so filtering
+    also needs `single_worker`. Rooms shared with other workers may have
+    players this process cannot place, and always get full-room broadcasts.
+    """
+
+    def __init__(
+        self,
+        *,
+        cell_size: float,
+        view_radius: int,
+        min_players: int,
+        single_worker: bool,
+    ) -> None:
+        self.view_radius = view_radius
+        self.min_players = min_players
+        self.single_worker = single_worker
+        self._cell_size = cell_size
+        self._rooms: dict[tuple[str, str], InterestGrid] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.single_worker and self.min_players > 0
+
+    def update(
+        self, room_key: str, sid: str, x: float, y: float, *, namespace: str
+    ) -> set[str]:
+        """Update the position of a player.
+
+        Returns the players that just came into view of the moved player, so
+        the caller can catch them up on their state.
+        """
+        grid = self._rooms.get((namespace, room_key))
+        if grid is None:
+            grid = self._rooms[(namespace, room_key)] = InterestGrid(self._cell_size)
+
+        previous, cell = grid.move(sid, x, y)
+        if previous == cell or not self._is_filtered(grid):
+            return set()
+
+        visible = grid.around(cell, self.view_radius)
+        if previous is not None:
+            visible -= grid.around(previous, self.view_radius)
+        visible.discard(sid)
+
+        return visible
+
+    def remove(self, room_key: str, sid: str, *, namespace: str) -> None:
+        grid = self._rooms.get((namespace, room_key))
+        if grid is None:
+            return
+
+        grid.remove(sid)
+        if len(grid) == 0:
+            del self._rooms[(namespace, room_key)]
+
+    def recipients(
+        self,
+        room_key: str,
+        sid: str,
+        *positions: tuple[float, float],
+        namespace: str,
+    ) -> list[str] | None:
+        """Get the players that can see something `sid` does at `positions`,
+        or None when the whole room should get it."""
+        grid = self._rooms.get((namespace, room_key))
+        if grid is None or not self._is_filtered(grid):
+            return None
+
+        cells = {grid.cell_of(x, y) for x, y in positions}
+        current = grid.get(sid)
+        if current is not None:
+            cells.add(current)
+
+        sids: set[str] = set()
+        for cell in cells:
+            sids |= grid.around(cell, self.view_radius)
+
+        return list(sids)
+
+    def _is_filtered(self, grid: InterestGrid) -> bool:
+        return self.enabled and len(grid) >= self.min_players
+
+
+area_of_interest = AreaOfInterest(
+    cell_size=AOI_CELL_SIZE,
+    view_radius=AOI_VIEW_RADIUS,
+    min_players=AOI_MIN_PLAYERS,
+    # every other backend may spread a room over several workers
+    single_worker=REALTIME_BACKEND == RealtimeBackend.MEMORY,
+)
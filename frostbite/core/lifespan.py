@@ -1,17 +1,25 @@
 from contextlib import asynccontextmanager
+from typing import cast
 
 import redis.asyncio as redis_async
 from fastapi import FastAPI
 from loguru import logger
 
+from frostbite.core.avatar_store import avatar_store
+from frostbite.core.catalog import load_catalog, set_catalog
+from frostbite.core.catalog_snapshot import load_catalog_snapshot
 from frostbite.core.config import (
+    CATALOG_SNAPSHOT_PATH,
+    REALTIME_BACKEND,
     REDIS_HOST,
     REDIS_PASSWORD,
     REDIS_PORT,
     REDIS_SSL_REQUIRED,
 )
 from frostbite.core.constants.events import EventEnum
+from frostbite.core.constants.realtime import RealtimeBackend
 from frostbite.core.realtime import redis
+from frostbite.core.realtime.local_redis import LocalRedis
 from frostbite.database import ASYNC_ENGINE, ASYNC_SESSION
 from frostbite.events import dispatch
 
@@ -31,22 +39,38 @@ async def manage_app_lifespan(app: FastAPI):
     async with ASYNC_ENGINE.begin() as conn:
         logger.info("Database connection successful")
 
-    logger.info("Connecting to redis")
-    app.state.redis = redis_pool = redis_async.Redis(
-        host=REDIS_HOST,
-        port=REDIS_PORT,
-        password=str(REDIS_PASSWORD) if REDIS_PASSWORD is not None else REDIS_PASSWORD,
-        ssl=REDIS_SSL_REQUIRED,
-    )
+    logger.info("Loading game catalog")
+    async with ASYNC_SESSION() as session:
+        if CATALOG_SNAPSHOT_PATH is not None:
+            set_catalog(await load_catalog_snapshot(session, CATALOG_SNAPSHOT_PATH))
+        else:
+            set_catalog(await load_catalog(session))
+
+    if REALTIME_BACKEND == RealtimeBackend.MEMORY:
+        logger.info("Using in-process storage instead of redis")
+        app.state.redis = redis_pool = cast(redis_async.Redis, LocalRedis())
+    else:
+        logger.info("Connecting to redis")
+        app.state.redis = redis_pool = redis_async.Redis(
+            host=REDIS_HOST,
+            port=REDIS_PORT,
+            password=(
+                str(REDIS_PASSWORD) if REDIS_PASSWORD is not None else REDIS_PASSWORD
+            ),
+            ssl=REDIS_SSL_REQUIRED,
+        )
+        await redis_pool.ping()
+        logger.info("Redis connection established")
     redis.set_redis_pool(redis_pool)
-    await app.state.redis.ping()
-    logger.info("Redis connection established")
 
     logger.info("Dispatching APP_START_EVENT")
     dispatch(EventEnum.APP_START_EVENT)
 
     yield
 
+    logger.info("Writing pending avatar changes")
+    await avatar_store.close()
+
     logger.info("Disconnecting from database")
     await app.state.db_engine.dispose()
     logger.info("Disconnected database connection")
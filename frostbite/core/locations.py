@@ -0,0 +1,57 @@
+from dataclasses import dataclass
+
+__all__ = ("PlayerLocation", "PlayerLocations", "player_locations")
+
+
+@dataclass(slots=True)
+class PlayerLocation:
+    room_key: str | None = None
+    game_key: str | None = None
+
+
+class PlayerLocations:
+    """Room and game each player of this process is in, by namespace and sid.
+
+    Kept alongside the socket.io rooms so the handlers can look them up
+    without going through the room memberships of the player.
+    """
+
+    def __init__(self) -> None:
+        self._locations: dict[tuple[str, str], PlayerLocation] = {}
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def get(self, sid: str, *, namespace: str) -> PlayerLocation | None:
+        return self._locations.get((namespace, sid))
+
+    def get_room(self, sid: str, *, namespace: str) -> str | None:
+        location = self._locations.get((namespace, sid))
+        return location.room_key if location is not None else None
+
+    def get_game(self, sid: str, *, namespace: str) -> str | None:
+        location = self._locations.get((namespace, sid))
+        return location.game_key if location is not None else None
+
+    def set_room(self, sid: str, room_key: str | None, *, namespace: str) -> None:
+        self._set(sid, namespace, room_key=room_key)
+
+    def set_game(self, sid: str, game_key: str | None, *, namespace: str) -> None:
+        self._set(sid, namespace, game_key=game_key)
+
+    def remove(self, sid: str, *, namespace: str) -> PlayerLocation | None:
+        return self._locations.pop((namespace, sid), None)
+
+    def _set(self, sid: str, namespace: str, **keys: str | None) -> None:
+        location = self._locations.get((namespace, sid))
+        if location is None:
+            location = self._locations[(namespace, sid)] = PlayerLocation()
+
+        for name, key in keys.items():
+            setattr(location, name, key)
+
+        if location.room_key is None and location.game_key is None:
+            del self._locations[(namespace, sid)]
+
+
+player_locations = PlayerLocations()
@@ -0,0 +1,179 @@
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Protocol
+
+from loguru import logger
+
+from frostbite.core.constants.close import CloseCode
+from frostbite.core.constants.mailbox import MailboxOverflowPolicy
+from frostbite.core.metrics import PacketOutcome, packet_metrics
+from frostbite.core.socket import (
+    SocketCriticalException,
+    SocketErrorEnum,
+    SocketException,
+    send_and_disconnect,
+    send_error,
+)
+
+__all__ = ("PacketMailbox", "PacketMailboxes")
+
+
+class PacketCallback(Protocol):
+    def __call__(
+        self, sid: str, op: str, data: Any, *, namespace: str
+    ) -> Awaitable[None]: ...
+
+
+@dataclass(slots=True)
+class MailboxItem:
+    op: str
+    data: Any
+    volatile: bool
+
+
+class PacketMailbox:
+    """Ordered queue of pending packets for a single connection."""
+
+    __slots__ = ("sid", "namespace", "items", "worker", "closed")
+
+    def __init__(self, sid: str, namespace: str) -> None:
+        self.sid = sid
+        self.namespace = namespace
+        self.items: deque[MailboxItem] = deque()
+        self.worker: asyncio.Task | None = None
+        self.closed = False
+
+    def drop_oldest_volatile(self) -> MailboxItem | None:
+        for index, item in enumerate(self.items):
+            if item.volatile:
+                del self.items[index]
+                return item
+
+        return None
+
+
+class PacketMailboxes:
+    """Per-connection packet mailboxes.
+
+    Packets from one connection are dispatched one at a time and in the order
+    they were received, by a worker task that only lives while the mailbox has
+    pending packets. Each mailbox holds at most `depth` packets; what happens
+    to a packet that does not fit is decided by the overflow `policy`:
+
+    - `DROP_VOLATILE` drops the oldest pending volatile packet (e.g. a
+      movement that a later one supersedes). If there is none, the incoming
+      packet is rejected.
+    - `REJECT` drops the incoming packet and reports an error to the client.
+    - `DISCONNECT` disconnects the client.
+    """
+
+    def __init__(
+        self,
+        callback: PacketCallback,
+        *,
+        depth: int,
+        policy: MailboxOverflowPolicy,
+        is_volatile: Callable[[str, str], bool],
+    ) -> None:
+        if depth < 1:
+            raise ValueError("Mailbox depth must be at least 1")
+
+        self._callback = callback
+        self._depth = depth
+        self._policy = policy
+        self._is_volatile = is_volatile
+        self._mailboxes: dict[str, PacketMailbox] = {}
+
+    def __len__(self) -> int:
+        return len(self._mailboxes)
+
+    def pending(self, sid: str) -> int:
+        mailbox = self._mailboxes.get(sid)
+        return len(mailbox.items) if mailbox is not None else 0
+
+    async def put(self, sid: str, op: str, data: Any, *, namespace: str) -> None:
+        mailbox = self._mailboxes.get(sid)
+        if mailbox is None:
+            mailbox = self._mailboxes[sid] = PacketMailbox(sid, namespace)
+        elif mailbox.closed:
+            return
+
+        item = MailboxItem(op, data, self._is_volatile(op, namespace))
+
+        if len(mailbox.items) >= self._depth and not await self._overflow(
+            mailbox, item
+        ):
+            return
+
+        mailbox.items.append(item)
+
+        if mailbox.worker is None:
+            mailbox.worker = asyncio.create_task(self._drain(mailbox))
+
+    def close(self, sid: str) -> None:
+        """Discard the mailbox of a connection and its pending packets.
+
+        The packet currently being dispatched, if any, is left to finish.
+        """
+        mailbox = self._mailboxes.pop(sid, None)
+        if mailbox is not None:
+            mailbox.closed = True
+            mailbox.items.clear()
+
+    async def _drain(self, mailbox: PacketMailbox) -> None:
+        try:
+            while mailbox.items:
+                item = mailbox.items.popleft()
+                try:
+                    await self._callback(
+                        mailbox.sid, item.op, item.data, namespace=mailbox.namespace
+                    )
+                except Exception as e:
+                    logger.opt(exception=e).error(
+                        f"An error occurred when draining the mailbox of {mailbox.sid}"
+                    )
+        finally:
+            mailbox.worker = None
+
+    async def _overflow(self, mailbox: PacketMailbox, item: MailboxItem) -> bool:
+        """Apply the overflow policy, returns whether `item` may be enqueued."""
+        if self._policy == MailboxOverflowPolicy.DISCONNECT:
+            logger.warning(f"Mailbox of {mailbox.sid} overflowed, disconnecting")
+            # keep the closed mailbox around until the disconnect goes through,
+            # so packets still in flight are ignored
+            mailbox.closed = True
+            mailbox.items.clear()
+            self._record_drop(mailbox.namespace, item)
+            await send_and_disconnect(
+                mailbox.sid,
+                SocketCriticalException(CloseCode.POLICY_VIOLATION, "Too many packets"),
+                namespace=mailbox.namespace,
+            )
+            return False
+
+        if self._policy == MailboxOverflowPolicy.DROP_VOLATILE:
+            dropped = mailbox.drop_oldest_volatile()
+            if dropped is not None:
+                self._record_drop(mailbox.namespace, dropped)
+                return True
+
+            if item.volatile:
+                # nothing older to make room for it, so the newest volatile
+                # packet is the one to go
+                self._record_drop(mailbox.namespace, item)
+                return False
+
+        self._record_drop(mailbox.namespace, item)
+        await send_error(
+            mailbox.sid,
+            SocketException(SocketErrorEnum.TOO_MANY_PACKETS, "Too many packets"),
+            namespace=mailbox.namespace,
+        )
+        return False
+
+    def _record_drop(self, namespace: str, item: MailboxItem) -> None:
+        # only volatile ops are known to be registered, anything else is
+        # bucketed together to keep the label set bounded
+        op = item.op if item.volatile else "*"
+        packet_metrics.get(namespace, op).outcomes[PacketOutcome.DROPPED] += 1
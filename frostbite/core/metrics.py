@@ -0,0 +1,202 @@
+import math
+from array import array
+from enum import Enum
+from time import perf_counter_ns
+from typing import Iterator
+
+__all__ = (
+    "LatencyHistogram",
+    "PacketOutcome",
+    "OpMetrics",
+    "PacketMetrics",
+    "packet_metrics",
+)
+
+
+class LatencyHistogram:
+    """Log-linear latency histogram in the spirit of HdrHistogram.
+
+    Values are recorded in microseconds. Every power of two range is split
+    into a fixed number of linear sub-buckets, so the relative error of any
+    reported percentile is bounded by `significant_figures`, while recording
+    stays O(1) and memory stays constant regardless of the sample count.
+    """
+
+    __slots__ = (
+        "_sub_bucket_bits",
+        "_sub_bucket_half",
+        "_highest",
+        "_counts",
+        "count",
+        "total",
+        "min",
+        "max",
+    )
+
+    def __init__(
+        self, *, highest_trackable: int = 60_000_000, significant_figures: int = 2
+    ) -> None:
+        if not 1 <= significant_figures <= 5:
+            raise ValueError("significant_figures must be between 1 and 5")
+
+        self._sub_bucket_bits = math.ceil(math.log2(2 * 10**significant_figures))
+        self._sub_bucket_half = 1 << (self._sub_bucket_bits - 1)
+        self._highest = highest_trackable
+        self._counts = array("Q", bytes(8 * (self._index_of(highest_trackable) + 1)))
+
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def _index_of(self, value: int) -> int:
+        bucket = max(0, value.bit_length() - self._sub_bucket_bits)
+        return bucket * self._sub_bucket_half + (value >> bucket)
+
+    def _value_at(self, index: int) -> int:
+        if index < 2 * self._sub_bucket_half:
+            return index
+
+        bucket = index // self._sub_bucket_half - 1
+        sub_bucket = index - bucket * self._sub_bucket_half
+        # report the highest value equivalent to this bucket
+        return ((sub_bucket + 1) << bucket) - 1
+
+    def record(self, value: int) -> None:
+        value = min(max(value, 0), self._highest)
+        self._counts[self._index_of(value)] += 1
+
+        if self.count == 0 or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+        self.count += 1
+        self.total += value
+
+    def value_at_percentile(self, percentile: float) -> int:
+        if self.count == 0:
+            return 0
+
+        target = max(1, math.ceil(self.count * min(percentile, 100.0) / 100))
+        seen = 0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if seen >= target:
+                return min(self._value_at(index), self.max)
+
+        return self.max
+
+    def reset(self) -> None:
+        self._counts = array("Q", bytes(8 * len(self._counts)))
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+
+class PacketOutcome(Enum):
+    OK = "ok"
+    INVALID = "invalid"
+    ERROR = "error"
+    CRITICAL = "critical"
+    EXCEPTION = "exception"
+    UNHANDLED = "unhandled"
+    DROPPED = "dropped"
+
+
+class OpMetrics:
+    __slots__ = ("latency", "outcomes", "in_flight")
+
+    def __init__(self) -> None:
+        self.latency = LatencyHistogram()
+        self.outcomes: dict[PacketOutcome, int] = dict.fromkeys(PacketOutcome, 0)
+        self.in_flight = 0
+
+    def start(self) -> int:
+        self.in_flight += 1
+        return perf_counter_ns()
+
+    def finish(self, started: int, outcome: PacketOutcome) -> None:
+        self.in_flight -= 1
+        self.outcomes[outcome] += 1
+        self.latency.record((perf_counter_ns() - started) // 1000)
+
+
+class PacketMetrics:
+    """Per namespace and opcode packet dispatch statistics."""
+
+    QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+    def __init__(self) -> None:
+        self._ops: dict[tuple[str, str], OpMetrics] = {}
+
+    def get(self, namespace: str, op: str) -> OpMetrics:
+        key = (namespace, op)
+        metrics = self._ops.get(key)
+        if metrics is None:
+            metrics = self._ops[key] = OpMetrics()
+
+        return metrics
+
+    def items(self) -> Iterator[tuple[tuple[str, str], OpMetrics]]:
+        return iter(sorted(self._ops.items(), key=lambda item: item[0]))
+
+    def reset(self) -> None:
+        self._ops.clear()
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        latency = [
+            "# HELP frostbite_packet_latency_seconds Packet dispatch latency.",
+            "# TYPE frostbite_packet_latency_seconds summary",
+        ]
+        latency_max = [
+            "# HELP frostbite_packet_latency_max_seconds Slowest packet dispatch.",
+            "# TYPE frostbite_packet_latency_max_seconds gauge",
+        ]
+        packets = [
+            "# HELP frostbite_packets_total Dispatched packets by outcome.",
+            "# TYPE frostbite_packets_total counter",
+        ]
+        in_flight = [
+            "# HELP frostbite_packets_in_flight Packets currently being dispatched.",
+            "# TYPE frostbite_packets_in_flight gauge",
+        ]
+
+        for (namespace, op), metrics in self.items():
+            labels = f'namespace="{_escape(namespace)}",op="{_escape(op)}"'
+            histogram = metrics.latency
+
+            for quantile in self.QUANTILES:
+                value = histogram.value_at_percentile(quantile * 100) / 1_000_000
+                latency.append(
+                    f'frostbite_packet_latency_seconds{{{labels},quantile="{quantile}"}} {value}'
+                )
+            latency.append(
+                f"frostbite_packet_latency_seconds_sum{{{labels}}} {histogram.total / 1_000_000}"
+            )
+            latency.append(
+                f"frostbite_packet_latency_seconds_count{{{labels}}} {histogram.count}"
+            )
+            latency_max.append(
+                f"frostbite_packet_latency_max_seconds{{{labels}}} {histogram.max / 1_000_000}"
+            )
+
+            for outcome, count in metrics.outcomes.items():
+                packets.append(
+                    f'frostbite_packets_total{{{labels},outcome="{outcome.value}"}} {count}'
+                )
+
+            in_flight.append(
+                f"frostbite_packets_in_flight{{{labels}}} {metrics.in_flight}"
+            )
+
+        return "\n".join(latency + latency_max + packets + in_flight) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+packet_metrics = PacketMetrics()
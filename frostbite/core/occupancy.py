@@ -0,0 +1,97 @@
+import itertools
+import time
+from typing import Iterable, Iterator
+
+from frostbite.core.catalog import CatalogRoom
+from frostbite.core.config import ROOM_MAX_INSTANCES, ROOM_OCCUPANCY_REFRESH
+
+__all__ = ("RoomOccupancy", "room_occupancy")
+
+
+class RoomOccupancy:
+    """Last known number of players in each room instance of the world.
+
+    The counts in Redis are the ones that matter, joining an instance
+    reserves a slot there atomically. This copy is only used to rank rooms
+    and instances without a round trip, so it may lag behind by up to
+    `refresh_interval` seconds.
+
+    Rooms may be split in up to `max_instances` instances of `max_users`
+    players each, or any number of them if it is 0.
+    """
+
+    def __init__(self, refresh_interval: float, max_instances: int = 0) -> None:
+        self.refresh_interval = refresh_interval
+        self.max_instances = max_instances
+        self._counts: dict[int, dict[int, int]] = {}
+        self._refreshed_at: float | None = None
+
+    def get(self, room_id: int, instance: int = 0) -> int:
+        return self._counts.get(room_id, {}).get(instance, 0)
+
+    def total(self, room_id: int) -> int:
+        return sum(self._counts.get(room_id, {}).values())
+
+    def set(self, room_id: int, instance: int, count: int) -> None:
+        instances = self._counts.setdefault(room_id, {})
+        if count > 0:
+            instances[instance] = count
+        else:
+            instances.pop(instance, None)
+
+    def update(self, counts: dict[tuple[int, int], int]) -> None:
+        self._counts = {}
+        for (room_id, instance), count in counts.items():
+            self.set(room_id, instance, count)
+
+        self._refreshed_at = time.monotonic()
+
+    def is_stale(self) -> bool:
+        return (
+            self._refreshed_at is None
+            or time.monotonic() - self._refreshed_at >= self.refresh_interval
+        )
+
+    def is_full(self, room: CatalogRoom) -> bool:
+        if self.max_instances == 0:
+            return room.max_users <= 0
+
+        return self.total(room.id) >= room.max_users * self.max_instances
+
+    def least_loaded(self, rooms: Iterable[CatalogRoom]) -> list[CatalogRoom]:
+        """Rooms that are not full, the emptiest relative to its size first."""
+        available = [room for room in rooms if not self.is_full(room)]
+        available.sort(key=lambda room: self.total(room.id) / room.max_users)
+        return available
+
+    def instances(self, room: CatalogRoom) -> Iterator[int]:
+        """Instances of a room to try joining, in order.
+
+        The instances that are not full come first, the least full first,
+        followed by new instances.
+        """
+        if room.max_users <= 0:
+            return
+
+        counts = self._counts.get(room.id, {})
+        available = [
+            instance
+            for instance in {0, *counts}
+            if counts.get(instance, 0) < room.max_users
+        ]
+        available.sort(key=lambda instance: (counts.get(instance, 0), instance))
+        yield from available
+
+        if self.max_instances == 0:
+            numbers: Iterable[int] = itertools.count(1)
+        else:
+            numbers = range(1, self.max_instances)
+
+        for instance in numbers:
+            if instance not in counts:
+                yield instance
+
+
+room_occupancy = RoomOccupancy(
+    refresh_interval=ROOM_OCCUPANCY_REFRESH, max_instances=ROOM_MAX_INSTANCES
+)
@@ -0,0 +1,125 @@
+import asyncio
+from typing import Any
+
+from frostbite.core.realtime.redis import get_redis_pool
+
+__all__ = ("RedisBatch", "AutoBatcher", "auto_batcher")
+
+
+class RedisBatch:
+    """Redis commands sent together in one pipeline round trip.
+
+    Each queued command returns a future that resolves to its own result
+    once the batch is executed, e.g.
+
+        async with RedisBatch() as batch:
+            members = batch.queue("smembers", "rooms.100")
+            batch.queue("incr", "population")
+
+        members.result()
+
+    With `transaction`, the commands run atomically in a MULTI/EXEC block.
+    """
+
+    def __init__(self, *, transaction: bool = False) -> None:
+        self.transaction = transaction
+        self._commands: list[
+            tuple[str, tuple[Any, ...], dict[str, Any], asyncio.Future]
+        ] = []
+
+    def __len__(self) -> int:
+        return len(self._commands)
+
+    async def __aenter__(self) -> "RedisBatch":
+        return self
+
+    async def __aexit__(self, exc_type: Any, *exc_info: Any) -> None:
+        if exc_type is None:
+            await self.execute()
+        else:
+            self.cancel()
+
+    def queue(self, command: str, *args: Any, **kwargs: Any) -> asyncio.Future:
+        if not hasattr(get_redis_pool(), command):
+            raise ValueError(f"Redis pool has no command: {command}")
+
+        future = asyncio.get_running_loop().create_future()
+        self._commands.append((command, args, kwargs, future))
+        return future
+
+    def cancel(self) -> None:
+        commands, self._commands = self._commands, []
+        for *_, future in commands:
+            future.cancel()
+
+    async def execute(self) -> list[Any]:
+        commands, self._commands = self._commands, []
+        if not commands:
+            return []
+
+        try:
+            async with get_redis_pool().pipeline(transaction=self.transaction) as pipe:
+                for command, args, kwargs, _ in commands:
+                    getattr(pipe, command)(*args, **kwargs)
+
+                results = await pipe.execute(raise_on_error=False)
+        except asyncio.CancelledError:
+            for *_, future in commands:
+                future.cancel()
+            raise
+        except Exception as e:
+            for *_, future in commands:
+                if not future.done():
+                    future.set_exception(e)
+            raise
+
+        for (*_, future), result in zip(commands, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+        return results
+
+
+class AutoBatcher:
+    """Sends every command queued within the same event loop iteration in a
+    single pipeline.
+
+    The pipeline is sent on the next iteration, so concurrent callers pay
+    for one round trip instead of one each. Commands of one batch run in
+    the order they were queued but not atomically.
+    """
+
+    def __init__(self) -> None:
+        self._batch: RedisBatch | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    def queue(self, command: str, *args: Any, **kwargs: Any) -> asyncio.Future:
+        if self._batch is None:
+            self._batch = RedisBatch()
+            asyncio.get_running_loop().call_soon(self._flush)
+
+        return self._batch.queue(command, *args, **kwargs)
+
+    def _flush(self) -> None:
+        batch, self._batch = self._batch, None
+        if batch is None or len(batch) == 0:
+            return
+
+        task = asyncio.create_task(self._execute(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    @staticmethod
+    async def _execute(batch: RedisBatch) -> None:
+        try:
+            await batch.execute()
+        except Exception:
+            # already handed to the callers through their futures
+            pass
+
+
+auto_batcher = AutoBatcher()
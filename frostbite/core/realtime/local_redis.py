@@ -0,0 +1,243 @@
+import time
+from typing import Any, Iterable
+
+__all__ = ("LocalRedis", "LocalPipeline")
+
+type Members = set[bytes]
+type Value = bytes | Members | dict[bytes, bytes]
+
+
+def _encode(value: Any) -> bytes:
+    if isinstance(value, bytes):
+        return value
+    if isinstance(value, str):
+        return value.encode()
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return repr(value).encode()
+
+    raise TypeError(f"Invalid input of type: {type(value).__name__!r}")
+
+
+class LocalRedis:
+    """In-process stand-in for the Redis client, for single worker worlds.
+
+    Only the commands used by the entities are implemented. Like a client
+    without `decode_responses`, every value is returned as bytes.
+    """
+
+    def __init__(self) -> None:
+        self._data: dict[str, Value] = {}
+        self._expires: dict[str, float] = {}
+
+    def _get(self, key: str) -> Value | None:
+        deadline = self._expires.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self._data.pop(key, None)
+            del self._expires[key]
+
+        return self._data.get(key)
+
+    def _get_set(self, key: str, create: bool = False) -> Members:
+        value = self._get(key)
+        if value is None:
+            value = set()
+            if create:
+                self._data[key] = value
+        elif not isinstance(value, set):
+            raise TypeError(f"{key} does not hold a set")
+
+        return value
+
+    def _get_hash(self, key: str, create: bool = False) -> dict[bytes, bytes]:
+        value = self._get(key)
+        if value is None:
+            value = {}
+            if create:
+                self._data[key] = value
+        elif not isinstance(value, dict):
+            raise TypeError(f"{key} does not hold a hash")
+
+        return value
+
+    def _drop_if_empty(self, key: str) -> None:
+        if not self._data.get(key, True):
+            del self._data[key]
+            self._expires.pop(key, None)
+
+    async def ping(self) -> bool:
+        return True
+
+    async def close(self) -> None:
+        self._data.clear()
+        self._expires.clear()
+
+    async def exists(self, *keys: str) -> int:
+        return sum(self._get(key) is not None for key in keys)
+
+    async def delete(self, *keys: str) -> int:
+        deleted = 0
+        for key in keys:
+            if self._get(key) is not None:
+                del self._data[key]
+                self._expires.pop(key, None)
+                deleted += 1
+
+        return deleted
+
+    async def expire(self, key: str, seconds: float) -> bool:
+        if self._get(key) is None:
+            return False
+
+        self._expires[key] = time.monotonic() + seconds
+        return True
+
+    async def get(self, key: str) -> bytes | None:
+        value = self._get(key)
+        if value is not None and not isinstance(value, bytes):
+            raise TypeError(f"{key} does not hold a string")
+
+        return value
+
+    async def set(
+        self, key: str, value: Any, ex: float | None = None, nx: bool = False
+    ) -> bool | None:
+        if nx and self._get(key) is not None:
+            return None
+
+        self._data[key] = _encode(value)
+        if ex is not None:
+            self._expires[key] = time.monotonic() + ex
+        else:
+            self._expires.pop(key, None)
+
+        return True
+
+    async def incrby(self, key: str, amount: int = 1) -> int:
+        value = int(await self.get(key) or 0) + amount
+        self._data[key] = _encode(value)
+        return value
+
+    async def incr(self, key: str, amount: int = 1) -> int:
+        return await self.incrby(key, amount)
+
+    async def decrby(self, key: str, amount: int = 1) -> int:
+        return await self.incrby(key, -amount)
+
+    async def decr(self, key: str, amount: int = 1) -> int:
+        return await self.incrby(key, -amount)
+
+    async def sadd(self, key: str, *values: Any) -> int:
+        members = self._get_set(key, create=True)
+        before = len(members)
+        members.update(map(_encode, values))
+        return len(members) - before
+
+    async def srem(self, key: str, *values: Any) -> int:
+        members = self._get_set(key)
+        before = len(members)
+        members.difference_update(map(_encode, values))
+        self._drop_if_empty(key)
+        return before - len(members)
+
+    async def smembers(self, key: str) -> Members:
+        return set(self._get_set(key))
+
+    async def sismember(self, key: str, value: Any) -> bool:
+        return _encode(value) in self._get_set(key)
+
+    async def scard(self, key: str) -> int:
+        return len(self._get_set(key))
+
+    async def hset(
+        self,
+        key: str,
+        field: Any = None,
+        value: Any = None,
+        mapping: dict[Any, Any] | None = None,
+    ) -> int:
+        items: list[tuple[Any, Any]] = list((mapping or {}).items())
+        if field is not None:
+            items.append((field, value))
+
+        fields = self._get_hash(key, create=True)
+        added = 0
+        for f, v in items:
+            f = _encode(f)
+            added += f not in fields
+            fields[f] = _encode(v)
+
+        return added
+
+    async def hget(self, key: str, field: Any) -> bytes | None:
+        return self._get_hash(key).get(_encode(field))
+
+    async def hmget(self, key: str, fields: Iterable[Any]) -> list[bytes | None]:
+        values = self._get_hash(key)
+        return [values.get(_encode(f)) for f in fields]
+
+    async def hgetall(self, key: str) -> dict[bytes, bytes]:
+        return dict(self._get_hash(key))
+
+    async def hdel(self, key: str, *fields: Any) -> int:
+        values = self._get_hash(key)
+        deleted = sum(values.pop(_encode(f), None) is not None for f in fields)
+        self._drop_if_empty(key)
+        return deleted
+
+    async def hlen(self, key: str) -> int:
+        return len(self._get_hash(key))
+
+    async def hincrby(self, key: str, field: Any, amount: int = 1) -> int:
+        values = self._get_hash(key, create=True)
+        value = int(values.get(_encode(field), b"0")) + amount
+        values[_encode(field)] = _encode(value)
+        return value
+
+    async def publish(self, channel: str, message: Any) -> int:
+        # nobody else to deliver to
+        return 0
+
+    def pipeline(self, transaction: bool = True) -> "LocalPipeline":
+        return LocalPipeline(self)
+
+
+class LocalPipeline:
+    """Queues commands for a `LocalRedis` and runs them on `execute`.
+
+    Commands never interleave with others since nothing is awaited in
+    between, so every pipeline behaves like a transaction.
+    """
+
+    def __init__(self, redis: LocalRedis) -> None:
+        self._redis = redis
+        self._commands: list[tuple[str, tuple[Any, ...], dict[str, Any]]] = []
+
+    async def __aenter__(self) -> "LocalPipeline":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self._commands.clear()
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_") or not hasattr(self._redis, name):
+            raise AttributeError(name)
+
+        def queue(*args: Any, **kwargs: Any) -> "LocalPipeline":
+            self._commands.append((name, args, kwargs))
+            return self
+
+        return queue
+
+    async def execute(self, raise_on_error: bool = True) -> list[Any]:
+        commands, self._commands = self._commands, []
+
+        results: list[Any] = []
+        for name, args, kwargs in commands:
+            try:
+                results.append(await getattr(self._redis, name)(*args, **kwargs))
+            except Exception as e:
+                if raise_on_error:
+                    raise
+                results.append(e)
+
+        return results
@@ -0,0 +1,284 @@
+import asyncio
+import pickle
+import zlib
+from collections import Counter
+from typing import Any, AsyncGenerator, Callable
+
+import socketio
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+from frostbite.core.config import (
+    REALTIME_BACKEND,
+    REDIS_SIO_CHANNEL,
+    REDIS_SIO_SHARDS,
+    REDIS_URL,
+    SOCKET_SERIALIZER,
+)
+from frostbite.core.constants.realtime import RealtimeBackend
+from frostbite.core.constants.wire import WireSerializer
+
+__all__ = ("SerializedRedisManager", "ShardedRedisManager", "create_client_manager")
+
+
+class SerializedRedisManager(socketio.AsyncRedisManager):
+    """Redis client manager with a pluggable pub/sub message serializer.
+
+    The stock manager pickles every message. Messages from nodes that still
+    do are understood as well, so the serializer can be changed with a
+    rolling restart.
+    """
+
+    name = "aioredis-serialized"
+
+    def __init__(
+        self,
+        url: str,
+        *,
+        dumps: Callable[[Any], bytes],
+        loads: Callable[[bytes], Any],
+        channel: str = "socketio",
+        write_only: bool = False,
+        logger: Any = None,
+    ) -> None:
+        self._dumps = dumps
+        self._loads = loads
+        super().__init__(url, channel=channel, write_only=write_only, logger=logger)
+
+    def _serialize(self, data: dict[str, Any]) -> bytes:
+        if isinstance(data.get("data"), tuple):
+            # tuples are emitted as several arguments, keep them apart from
+            # lists once they went through the serializer
+            data = {**data, "data": list(data["data"]), "expand": True}
+
+        return self._dumps(data)
+
+    def _deserialize(self, message: bytes) -> dict[str, Any]:
+        data = self._loads(message)
+        if not isinstance(data, dict):
+            raise ValueError("Invalid pub/sub message")
+
+        if data.pop("expand", False):
+            data["data"] = tuple(data["data"])
+
+        return data
+
+    def _decode(self, message: Any) -> Any:
+        if isinstance(message, bytes):
+            try:
+                return self._deserialize(message)
+            except Exception:
+                # not ours, let the base manager try pickle and json
+                pass
+
+        return message
+
+    def _get_channel(self, data: dict[str, Any]) -> str:
+        return self.channel
+
+    async def _publish(self, data: dict[str, Any]) -> Any:
+        message = self._serialize(data)
+        channel = self._get_channel(data)
+
+        retry = True
+        while True:
+            try:
+                if not retry:
+                    # only replace the publishing connection, the listener
+                    # reconnects its subscriptions by itself
+                    self.redis = aioredis.Redis.from_url(
+                        self.redis_url, **self.redis_options
+                    )
+                return await self.redis.publish(channel, message)
+            except RedisError:
+                if retry:
+                    self._get_logger().error("Cannot publish to redis... retrying")
+                    retry = False
+                else:
+                    self._get_logger().error("Cannot publish to redis... giving up")
+                    break
+
+    async def _listen(self) -> AsyncGenerator[Any, None]:
+        async for message in super()._listen():
+            yield self._decode(message)
+
+
+class ShardedRedisManager(SerializedRedisManager):
+    """Redis client manager that spreads room emits over `shards` channels.
+
+    Emits to a room matching `room_prefixes` are published on the shard
+    channel of that room, and a node only subscribes to the shards of the
+    rooms its clients are in. Everything else, e.g. emits to a sid or to the
+    whole namespace, still goes through the main channel that every node
+    listens to.
+
+    All nodes of a world need the same channel and number of shards.
+    """
+
+    name = "aioredis-sharded"
+
+    def __init__(
+        self,
+        url: str,
+        *,
+        shards: int,
+        room_prefixes: tuple[str, ...] = ("rooms:", "games:"),
+        dumps: Callable[[Any], bytes] = pickle.dumps,
+        loads: Callable[[bytes], Any] = pickle.loads,
+        channel: str = "socketio",
+        write_only: bool = False,
+        logger: Any = None,
+    ) -> None:
+        if shards < 1:
+            raise ValueError("Number of shards must be at least 1")
+
+        self.shards = shards
+        self.room_prefixes = room_prefixes
+        self._shard_members: Counter[str] = Counter()
+        super().__init__(
+            url,
+            dumps=dumps,
+            loads=loads,
+            channel=channel,
+            write_only=write_only,
+            logger=logger,
+        )
+        self._subscribed: set[str] = set()
+        self._subscription_lock = asyncio.Lock()
+        self._subscription_task: asyncio.Task | None = None
+
+    def get_shard_channel(self, namespace: str, room: Any) -> str | None:
+        if not isinstance(room, str) or not room.startswith(self.room_prefixes):
+            return None
+
+        shard = zlib.crc32(f"{namespace}#{room}".encode()) % self.shards
+        return f"{self.channel}#{shard}"
+
+    def basic_enter_room(
+        self, sid: str, namespace: str, room: Any, eio_sid: str | None = None
+    ) -> None:
+        joined = not self._in_room(sid, namespace, room)
+        super().basic_enter_room(sid, namespace, room, eio_sid=eio_sid)
+
+        channel = self.get_shard_channel(namespace, room)
+        if joined and channel is not None:
+            self._shard_members[channel] += 1
+            self._schedule_subscriptions()
+
+    def basic_leave_room(self, sid: str, namespace: str, room: Any) -> None:
+        left = self._in_room(sid, namespace, room)
+        super().basic_leave_room(sid, namespace, room)
+
+        channel = self.get_shard_channel(namespace, room)
+        if left and channel is not None:
+            self._shard_members[channel] -= 1
+            if self._shard_members[channel] <= 0:
+                del self._shard_members[channel]
+            self._schedule_subscriptions()
+
+    async def enter_room(
+        self, sid: str, namespace: str, room: Any, eio_sid: str | None = None
+    ) -> Any:
+        result = await super().enter_room(sid, namespace, room, eio_sid=eio_sid)
+        # subscribe before returning, so emits to the room right after a join
+        # are not missed
+        await self._sync_subscriptions()
+        return result
+
+    def _in_room(self, sid: str, namespace: str, room: Any) -> bool:
+        return sid in self.rooms.get(namespace, {}).get(room, ())
+
+    def _get_channel(self, data: dict[str, Any]) -> str:
+        if data.get("method") == "emit":
+            channel = self.get_shard_channel(data["namespace"], data.get("room"))
+            if channel is not None:
+                return channel
+
+        return self.channel
+
+    def _redis_connect(self) -> None:
+        super()._redis_connect()
+        # a new connection starts without any subscriptions
+        if hasattr(self, "_subscribed"):
+            self._subscribed = set()
+            self._schedule_subscriptions()
+
+    def _schedule_subscriptions(self) -> None:
+        if self.write_only or self._subscription_task is not None:
+            return
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        self._subscription_task = loop.create_task(self._run_subscriptions())
+
+    async def _run_subscriptions(self) -> None:
+        try:
+            await self._sync_subscriptions()
+        finally:
+            self._subscription_task = None
+
+    async def _sync_subscriptions(self) -> None:
+        if self.write_only:
+            return
+
+        async with self._subscription_lock:
+            wanted = set(self._shard_members)
+            subscribe = wanted - self._subscribed
+            unsubscribe = self._subscribed - wanted
+
+            try:
+                if subscribe:
+                    await self.pubsub.subscribe(*subscribe)
+                if unsubscribe:
+                    await self.pubsub.unsubscribe(*unsubscribe)
+            except RedisError:
+                self._get_logger().error("Cannot update redis shard subscriptions")
+                return
+
+            self._subscribed = wanted
+
+    async def _listen(self) -> AsyncGenerator[Any, None]:
+        channel = self.channel.encode()
+        await self.pubsub.subscribe(self.channel)
+        await self._sync_subscriptions()
+
+        async for message in self._redis_listen_with_retries():
+            if message["type"] != "message" or "data" not in message:
+                continue
+
+            source = message["channel"]
+            if source == channel or source.decode() in self._subscribed:
+                yield self._decode(message["data"])
+
+
+def create_client_manager() -> socketio.AsyncManager:
+    if REALTIME_BACKEND == RealtimeBackend.MEMORY:
+        return socketio.AsyncManager()
+
+    url = REDIS_URL.render_as_string(False)
+
+    dumps: Callable[[Any], bytes] = pickle.dumps
+    loads: Callable[[bytes], Any] = pickle.loads
+    if SOCKET_SERIALIZER == WireSerializer.MSGPACK:
+        from frostbite.core import wire_msgpack
+
+        dumps, loads = wire_msgpack.dumps, wire_msgpack.loads
+
+    if REDIS_SIO_SHARDS > 0:
+        return ShardedRedisManager(
+            url,
+            shards=REDIS_SIO_SHARDS,
+            dumps=dumps,
+            loads=loads,
+            channel=REDIS_SIO_CHANNEL,
+        )
+
+    if SOCKET_SERIALIZER == WireSerializer.MSGPACK:
+        return SerializedRedisManager(
+            url, dumps=dumps, loads=loads, channel=REDIS_SIO_CHANNEL
+        )
+
+    return socketio.AsyncRedisManager(url, channel=REDIS_SIO_CHANNEL)
@@ -0,0 +1,296 @@
+import math
+from array import array
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator
+
+from frostbite.models.action import Action
+from frostbite.models.player import Player, PlayerState
+from frostbite.models.user import User
+
+__all__ = (
+    "PlayerRecord",
+    "RoomState",
+    "RoomStates",
+    "room_states",
+    "get_room_key",
+    "parse_room_key",
+)
+
+# layout of a row in `RoomState._floats`, missing values are stored as NaN
+X, Y, ACTION_X, ACTION_Y, ACTION_TO_X, ACTION_TO_Y, ACTION_SINCE = range(7)
+ROW_SIZE = 7
+
+NAN = math.nan
+
+
+def get_room_key(room_id: int, instance: int = 0) -> str:
+    """Get the key of an instance of a room, `rooms:{id}` for the first one
+    and `rooms:{id}#{n}` for the others."""
+    if instance == 0:
+        return f"rooms:{room_id}"
+
+    return f"rooms:{room_id}#{instance}"
+
+
+def parse_room_key(room_key: str) -> tuple[int, int]:
+    """Get the room id and instance number of a room key."""
+    room, _, instance = room_key.split(":")[-1].partition("#")
+    return int(room), int(instance or 0)
+
+
+def _pack(value: float | None) -> float:
+    return NAN if value is None else value
+
+
+def _unpack(value: float) -> float | None:
+    return None if math.isnan(value) else value
+
+
+@dataclass(slots=True)
+class PlayerRecord:
+    """A player in a room, as read from its `RoomState`."""
+
+    sid: str
+    user: User
+    x: float
+    y: float
+    action: Action
+
+    def to_player(self) -> Player:
+        return Player(user=self.user, x=self.x, y=self.y, action=self.action)
+
+    def to_state(self) -> PlayerState:
+        return PlayerState(x=self.x, y=self.y, action=self.action)
+
+
+class RoomState:
+    """The players in a room on this process.
+
+    Players are stored as rows of parallel arrays, one per column, and are
+    only turned into `Player` models when read. The `User` of a player is
+    shared with everything else that holds it.
+
+    Every change bumps `version`, anything built from the room with `derive`
+    (e.g. the serialized roster) is reused until the next change.
+    """
+
+    __slots__ = (
+        "room_key",
+        "namespace",
+        "version",
+        "_rows",
+        "_sids",
+        "_users",
+        "_action_types",
+        "_floats",
+        "_derived",
+        "_derived_version",
+    )
+
+    def __init__(self, room_key: str, namespace: str) -> None:
+        self.room_key = room_key
+        self.namespace = namespace
+        self.version = 0
+        self._rows: dict[str, int] = {}
+        self._sids: list[str] = []
+        self._users: list[User] = []
+        self._action_types = array("q")
+        self._floats = array("d")
+        self._derived: dict[Callable[["RoomState"], Any], Any] = {}
+        self._derived_version = 0
+
+    def __len__(self) -> int:
+        return len(self._sids)
+
+    def __contains__(self, sid: str) -> bool:
+        return sid in self._rows
+
+    def __iter__(self) -> Iterator[PlayerRecord]:
+        for row in range(len(self._sids)):
+            yield self._read(row)
+
+    @property
+    def room_id(self) -> int:
+        return parse_room_key(self.room_key)[0]
+
+    @property
+    def instance(self) -> int:
+        return parse_room_key(self.room_key)[1]
+
+    def get(self, sid: str) -> PlayerRecord | None:
+        row = self._rows.get(sid)
+        return self._read(row) if row is not None else None
+
+    def position(self, sid: str) -> tuple[float, float] | None:
+        row = self._rows.get(sid)
+        if row is None:
+            return None
+
+        offset = row * ROW_SIZE
+        return self._floats[offset + X], self._floats[offset + Y]
+
+    def add(self, sid: str, user: User, *, x: float, y: float, action: Action) -> None:
+        row = self._rows.get(sid)
+        if row is None:
+            row = self._rows[sid] = len(self._sids)
+            self._sids.append(sid)
+            self._users.append(user)
+            self._action_types.append(0)
+            self._floats.extend((NAN,) * ROW_SIZE)
+        else:
+            self._users[row] = user
+
+        offset = row * ROW_SIZE
+        self._floats[offset + X] = x
+        self._floats[offset + Y] = y
+        self._write_action(row, action)
+        self.version += 1
+
+    def remove(self, sid: str) -> PlayerRecord | None:
+        row = self._rows.pop(sid, None)
+        if row is None:
+            return None
+
+        record = self._read(row)
+
+        # move the last row into the hole, so the columns stay dense
+        last = len(self._sids) - 1
+        if row != last:
+            moved = self._sids[row] = self._sids[last]
+            self._rows[moved] = row
+            self._users[row] = self._users[last]
+            self._action_types[row] = self._action_types[last]
+            self._floats[row * ROW_SIZE : (row + 1) * ROW_SIZE] = self._floats[
+                last * ROW_SIZE :
+            ]
+
+        self._sids.pop()
+        self._users.pop()
+        self._action_types.pop()
+        del self._floats[last * ROW_SIZE :]
+
+        self.version += 1
+        return record
+
+    def update(
+        self,
+        sid: str,
+        *,
+        x: float | None = None,
+        y: float | None = None,
+        action: Action | None = None,
+    ) -> None:
+        row = self._rows.get(sid)
+        if row is None:
+            return
+
+        if action is not None:
+            self._write_action(row, action)
+        if x is not None and y is not None:
+            offset = row * ROW_SIZE
+            self._floats[offset + X] = x
+            self._floats[offset + Y] = y
+
+        self.version += 1
+
+    def set_user(self, sid: str, user: User) -> None:
+        row = self._rows.get(sid)
+        if row is not None:
+            self._users[row] = user
+            self.version += 1
+
+    def roster(self) -> list[Player]:
+        return self.derive(RoomState._build_roster)
+
+    def derive[T](self, factory: Callable[["RoomState"], T]) -> T:
+        """Build something from the current state of the room, or get the one
+        built since the last change."""
+        if self._derived_version != self.version:
+            self._derived.clear()
+            self._derived_version = self.version
+
+        try:
+            return self._derived[factory]
+        except KeyError:
+            value = self._derived[factory] = factory(self)
+            return value
+
+    def _build_roster(self) -> list[Player]:
+        return [record.to_player() for record in self]
+
+    def _read(self, row: int) -> PlayerRecord:
+        offset = row * ROW_SIZE
+        floats = self._floats[offset : offset + ROW_SIZE]
+        user = self._users[row]
+
+        return PlayerRecord(
+            sid=self._sids[row],
+            user=user,
+            x=floats[X],
+            y=floats[Y],
+            action=Action(
+                player_id=user.id,
+                type=self._action_types[row],
+                x=_unpack(floats[ACTION_X]),
+                y=_unpack(floats[ACTION_Y]),
+                to_x=_unpack(floats[ACTION_TO_X]),
+                to_y=_unpack(floats[ACTION_TO_Y]),
+                since=_unpack(floats[ACTION_SINCE]),
+            ),
+        )
+
+    def _write_action(self, row: int, action: Action) -> None:
+        # first, so an out of range type leaves the row untouched
+        self._action_types[row] = action.type
+
+        offset = row * ROW_SIZE
+        self._floats[offset + ACTION_X] = _pack(action.x)
+        self._floats[offset + ACTION_Y] = _pack(action.y)
+        self._floats[offset + ACTION_TO_X] = _pack(action.to_x)
+        self._floats[offset + ACTION_TO_Y] = _pack(action.to_y)
+        self._floats[offset + ACTION_SINCE] = _pack(action.since)
+
+
+class RoomStates:
+    """Authoritative state of the rooms on this process, by namespace."""
+
+    def __init__(self) -> None:
+        self._rooms: dict[tuple[str, str], RoomState] = {}
+
+    def __len__(self) -> int:
+        return len(self._rooms)
+
+    def get(self, room_key: str, *, namespace: str) -> RoomState | None:
+        return self._rooms.get((namespace, room_key))
+
+    def join(
+        self,
+        room_key: str,
+        sid: str,
+        user: User,
+        *,
+        x: float,
+        y: float,
+        action: Action,
+        namespace: str,
+    ) -> RoomState:
+        state = self._rooms.get((namespace, room_key))
+        if state is None:
+            state = self._rooms[(namespace, room_key)] = RoomState(room_key, namespace)
+
+        state.add(sid, user, x=x, y=y, action=action)
+        return state
+
+    def leave(self, room_key: str, sid: str, *, namespace: str) -> PlayerRecord | None:
+        state = self._rooms.get((namespace, room_key))
+        if state is None:
+            return None
+
+        record = state.remove(sid)
+        if len(state) == 0:
+            del self._rooms[(namespace, room_key)]
+
+        return record
+
+
+room_states = RoomStates()
@@ -3,8 +3,9 @@ from typing import Any, Generator, cast
 
 import socketio
 
-from frostbite.core.config import ALLOWED_HOSTS, REDIS_URL
-from frostbite.models.packet import Packet
+from frostbite.core.config import ALLOWED_HOSTS
+from frostbite.core.realtime.manager import create_client_manager
+from frostbite.core.wire import EncodedPacket, encode_packet, wire_packet_class
 
 __all__ = (
     "mgr",
@@ -12,16 +13,19 @@ __all__ = (
     "SocketException",
     "SocketCriticalException",
     "SocketErrorEnum",
+    "encode_packet",
     "send_packet",
+    "send_encoded",
     "send_error",
     "send_and_disconnect",
     "get_sids_in_room",
 )
 
-SocketIOAsyncRedisManager = socketio.AsyncRedisManager(REDIS_URL.render_as_string(False))
+SocketIOAsyncRedisManager = create_client_manager()
 SocketIOAsyncServer = socketio.AsyncServer(
     async_mode="asgi",
     client_manager=SocketIOAsyncRedisManager,
+    serializer=wire_packet_class,
     cors_allowed_origins=ALLOWED_HOSTS or "*",  # Configure CORS as needed
 )
 
@@ -50,22 +54,41 @@ class SocketErrorEnum(IntEnum):
     GAME_FULL = 4201
     GAME_ALREADY_STARTED = 4202
     GAME_NOT_STARTED = 4203
+    # Connection
+    TOO_MANY_PACKETS = 4300
 
 
 async def send_packet(
-    sid_or_room: str,
+    sid_or_room: str | list[str],
     op: str,
     d: Any,
     *,
     skip_sid: str | None = None,
     namespace: str | None = None,
 ) -> None:
-    packet = Packet(op=op, d=d)
-    await sio.send(
-        packet.model_dump(), to=sid_or_room, skip_sid=skip_sid, namespace=namespace
+    await send_encoded(
+        sid_or_room, encode_packet(op, d), skip_sid=skip_sid, namespace=namespace
     )
 
 
+async def send_encoded(
+    sid_or_room: str | list[str],
+    packet: EncodedPacket,
+    *,
+    skip_sid: str | None = None,
+    namespace: str | None = None,
+) -> None:
+    """Send a packet encoded with `encode_packet`.
+
+    Encode a packet once and send it with this function when the same packet
+    goes out to several rooms or clients.
+    """
+    if not sid_or_room:
+        return
+
+    await sio.send(packet, to=sid_or_room, skip_sid=skip_sid, namespace=namespace)
+
+
 async def send_error(
     sid: str, error: SocketException, *, namespace: str | None = None
 ) -> None:
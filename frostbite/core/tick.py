@@ -0,0 +1,76 @@
+import asyncio
+import itertools
+from typing import Awaitable, Callable, Hashable
+
+from loguru import logger
+
+__all__ = ("TickCoalescer",)
+
+type FlushCallback[T] = Callable[[str, str, list[T]], Awaitable[None]]
+
+
+class TickCoalescer[T]:
+    """Collects items per room and flushes them in one batch per tick.
+
+    Items pushed with a `key` replace any pending item with the same key, so
+    only the latest state survives until the next tick. Items pushed without
+    a key are always delivered. A batch keeps the order in which its items
+    were last pushed.
+
+    The tick loop only runs while there is something to flush.
+    """
+
+    def __init__(self, rate: float, flush: FlushCallback[T]) -> None:
+        if rate <= 0:
+            raise ValueError("Tick rate must be positive")
+
+        self.interval = 1 / rate
+        self._flush = flush
+        self._pending: dict[tuple[str, str], dict[Hashable, T]] = {}
+        self._sequence = itertools.count()
+        self._task: asyncio.Task | None = None
+
+    def push(
+        self,
+        room_key: str,
+        item: T,
+        *,
+        namespace: str,
+        key: Hashable | None = None,
+    ) -> None:
+        batch = self._pending.setdefault((namespace, room_key), {})
+
+        if key is None:
+            key = ("#", next(self._sequence))
+        else:
+            # move the key to the end, so the batch stays in push order
+            batch.pop(key, None)
+
+        batch[key] = item
+
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def flush(self) -> None:
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+
+        results = await asyncio.gather(
+            *(
+                self._flush(namespace, room_key, list(batch.values()))
+                for (namespace, room_key), batch in pending.items()
+            ),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.opt(exception=result).error("Failed to flush a tick batch")
+
+    async def _run(self) -> None:
+        try:
+            while self._pending:
+                await asyncio.sleep(self.interval)
+                await self.flush()
+        finally:
+            self._task = None
@@ -0,0 +1,78 @@
+from typing import Any
+
+from engineio import json
+from socketio.packet import Packet as SocketIOPacket
+
+from frostbite.core.config import SOCKET_SERIALIZER
+from frostbite.core.constants.wire import WireSerializer
+from frostbite.models.packet import Packet
+
+__all__ = (
+    "EncodedPacket",
+    "WireJSON",
+    "WirePacket",
+    "get_wire_packet_class",
+    "wire_packet_class",
+    "encode_packet",
+)
+
+
+class EncodedPacket:
+    """A packet already serialized to its wire form.
+
+    Socket.IO splices the payload into the outgoing frame as is, and the
+    Redis manager pickles it as a plain string, so a broadcast is serialized
+    exactly once no matter how many recipients or nodes it reaches.
+    """
+
+    __slots__ = ("payload",)
+
+    def __init__(self, payload: str | bytes) -> None:
+        self.payload = payload
+
+    def __repr__(self) -> str:
+        return f"EncodedPacket({self.payload!r})"
+
+
+class WireJSON:
+    """Stand-in for the `json` module used by Socket.IO packets, that knows
+    how to splice `EncodedPacket`s into the output."""
+
+    loads = staticmethod(json.loads)
+
+    @staticmethod
+    def dumps(obj: Any, **kwargs: Any) -> str:
+        if not isinstance(obj, list) or not any(
+            isinstance(o, EncodedPacket) for o in obj
+        ):
+            return json.dumps(obj, **kwargs)
+
+        parts = [
+            o.payload if isinstance(o, EncodedPacket) else json.dumps(o, **kwargs)
+            for o in obj
+        ]
+        return "[" + ",".join(parts) + "]"
+
+
+class WirePacket(SocketIOPacket):
+    json = WireJSON
+
+    @classmethod
+    def encode_payload(cls, packet: Packet) -> EncodedPacket:
+        return EncodedPacket(packet.model_dump_json())
+
+
+def get_wire_packet_class(serializer: WireSerializer) -> type[WirePacket]:
+    if serializer == WireSerializer.MSGPACK:
+        from frostbite.core.wire_msgpack import MsgPackWirePacket
+
+        return MsgPackWirePacket
+
+    return WirePacket
+
+
+wire_packet_class = get_wire_packet_class(SOCKET_SERIALIZER)
+
+
+def encode_packet(op: str, d: Any) -> EncodedPacket:
+    return wire_packet_class.encode_payload(Packet(op=op, d=d))
@@ -0,0 +1,93 @@
+from typing import Any
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    raise RuntimeError(
+        'msgpack is not installed, it is required when SOCKET_SERIALIZER is "msgpack" '
+        '(Run "pip install msgpack" in your virtualenv).'
+    )
+
+from engineio import json
+
+from frostbite.core.wire import EncodedPacket, WirePacket
+from frostbite.models.packet import Packet
+
+__all__ = ("MsgPackWirePacket", "dumps", "loads")
+
+ENCODED_BYTES_EXT = 1
+ENCODED_STR_EXT = 2
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, EncodedPacket):
+        if isinstance(obj.payload, bytes):
+            return msgpack.ExtType(ENCODED_BYTES_EXT, obj.payload)
+        return msgpack.ExtType(ENCODED_STR_EXT, obj.payload.encode())
+
+    raise TypeError(f"Cannot serialize {type(obj).__name__}")
+
+
+def _ext_hook(code: int, data: bytes) -> Any:
+    if code == ENCODED_BYTES_EXT:
+        return EncodedPacket(data)
+    elif code == ENCODED_STR_EXT:
+        return EncodedPacket(data.decode())
+
+    return msgpack.ExtType(code, data)
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize a pub/sub message, keeping `EncodedPacket`s encoded."""
+    return msgpack.packb(obj, default=_default)
+
+
+def loads(data: bytes) -> Any:
+    return msgpack.unpackb(data, ext_hook=_ext_hook)
+
+
+class MsgPackWirePacket(WirePacket):
+    """Socket.IO packet using the MessagePack parser.
+
+    Compatible with the `socket.io-msgpack-parser` client package. Like
+    `WirePacket`, it splices `EncodedPacket`s into the frame without
+    serializing them again.
+    """
+
+    uses_binary_events = False
+
+    @classmethod
+    def encode_payload(cls, packet: Packet) -> EncodedPacket:
+        return EncodedPacket(msgpack.packb(packet.model_dump(mode="json")))
+
+    def encode(self) -> bytes:
+        packer = msgpack.Packer()
+        fields = self._to_dict()
+
+        chunks = [packer.pack_map_header(len(fields))]
+        for key, value in fields.items():
+            chunks.append(packer.pack(key))
+            if key == "data" and isinstance(value, list):
+                chunks.append(packer.pack_array_header(len(value)))
+                chunks.extend(self._pack_item(packer, item) for item in value)
+            else:
+                chunks.append(packer.pack(value))
+
+        return b"".join(chunks)
+
+    def decode(self, encoded_packet: bytes) -> None:
+        decoded = msgpack.unpackb(encoded_packet)
+        self.packet_type = decoded["type"]
+        self.data = decoded.get("data")
+        self.id = decoded.get("id")
+        self.namespace = decoded["nsp"]
+
+    @staticmethod
+    def _pack_item(packer: msgpack.Packer, item: Any) -> bytes:
+        if not isinstance(item, EncodedPacket):
+            return packer.pack(item)
+        elif isinstance(item.payload, bytes):
+            return item.payload
+
+        # encoded by a JSON node, e.g. while rolling out a serializer change
+        return packer.pack(json.loads(item.payload))
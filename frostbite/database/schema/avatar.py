@@ -1,11 +1,11 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from typing import TYPE_CHECKING
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from frostbite.database import Base
 
-
 if TYPE_CHECKING:
     from frostbite.database.schema.user import UserTable
 
@@ -26,3 +26,36 @@ class AvatarTable(Base):
     transformation: Mapped[str] = mapped_column(nullable=True)
 
     user: Mapped[UserTable] = relationship(back_populates="avatar", lazy="selectin")
+
+
+@dataclass(slots=True)
+class AvatarRow:
+    """Avatar columns of a user loaded with `UserTable.query_rows_by_ids`."""
+
+    id: int
+    color: int
+    head: int
+    face: int
+    neck: int
+    body: int
+    hand: int
+    feet: int
+    photo: int
+    flag: int
+    transformation: str | None
+
+    @staticmethod
+    def columns() -> tuple:
+        return (
+            AvatarTable.id,
+            AvatarTable.color,
+            AvatarTable.head,
+            AvatarTable.face,
+            AvatarTable.neck,
+            AvatarTable.body,
+            AvatarTable.hand,
+            AvatarTable.feet,
+            AvatarTable.photo,
+            AvatarTable.flag,
+            AvatarTable.transformation,
+        )
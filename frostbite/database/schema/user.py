@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from datetime import datetime
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterable
 from sqlalchemy import ARRAY, ForeignKey, String, Text, func, select
 from sqlalchemy.orm import Mapped, mapped_column, relationship, joinedload
 from sqlalchemy_utils import StringEncryptedType
@@ -9,11 +10,11 @@ from sqlalchemy_utils.types.encrypted.encrypted_type import AesEngine
 
 from frostbite.core.config import DATABASE_SECRET_KEY
 from frostbite.core.constants.scope import Scope
-from frostbite.database import ASYNC_SESSION, Base
+from frostbite.database import ASYNC_ENGINE, ASYNC_SESSION, Base
 
 if TYPE_CHECKING:
     from frostbite.database.schema.ban import BanTable
-    from frostbite.database.schema.avatar import AvatarTable
+    from frostbite.database.schema.avatar import AvatarRow, AvatarTable
     from frostbite.database.schema.mascots import MascotTable
 
 
@@ -24,8 +25,10 @@ class UserTable(Base):
     username: Mapped[str] = mapped_column(String(12), unique=True)
     nickname: Mapped[str] = mapped_column(String(20))
     password: Mapped[str] = mapped_column(Text())
+    # decrypted on first access only, nothing that loads users in bulk needs it
     email: Mapped[str] = mapped_column(
-        StringEncryptedType(String, str(DATABASE_SECRET_KEY), AesEngine, "pkcs5")
+        StringEncryptedType(String, str(DATABASE_SECRET_KEY), AesEngine, "pkcs5"),
+        deferred=True,
     )
 
     lang: Mapped[int] = mapped_column(default=0)
@@ -62,6 +65,63 @@ class UserTable(Base):
 
             return (await session.execute(user_query)).scalar()
 
+    @classmethod
+    async def query_by_ids(cls, user_ids: Iterable[int]) -> list[UserTable]:
+        from frostbite.database.schema.ban import BanTable
+
+        user_ids = set(user_ids)
+        if not user_ids:
+            return []
+
+        async with ASYNC_SESSION() as session:
+            users_query = (
+                select(UserTable)
+                .options(
+                    joinedload(
+                        UserTable.bans.and_(BanTable.ban_expire > datetime.now())
+                    )
+                )
+                .where(UserTable.id.in_(user_ids))
+            )
+
+            return list((await session.execute(users_query)).unique().scalars())
+
+    @classmethod
+    async def query_row_by_id(cls, user_id: int) -> UserRow | None:
+        rows = await cls.query_rows_by_ids([user_id])
+        return rows[0] if rows else None
+
+    @classmethod
+    async def query_rows_by_ids(cls, user_ids: Iterable[int]) -> list[UserRow]:
+        """Load the public columns of users and their avatar, without going
+        through the ORM.
+
+        Bans, scopes, the mascot and the credentials are left out, use
+        `query_by_ids` when those are needed.
+        """
+        from frostbite.database.schema.avatar import AvatarRow, AvatarTable
+
+        user_ids = set(user_ids)
+        if not user_ids:
+            return []
+
+        users_query = (
+            select(
+                UserTable.id,
+                UserTable.username,
+                UserTable.nickname,
+                UserTable.mascot_id,
+                *AvatarRow.columns(),
+            )
+            .join(AvatarTable, UserTable.avatar_id == AvatarTable.id)
+            .where(UserTable.id.in_(user_ids))
+        )
+
+        async with ASYNC_ENGINE.connect() as connection:
+            rows = (await connection.execute(users_query)).all()
+
+        return [UserRow(*row[:4], avatar=AvatarRow(*row[4:])) for row in rows]
+
     @classmethod
     async def query_by_username(cls, username: str) -> UserTable | None:
         from frostbite.database.schema.ban import BanTable
@@ -75,3 +135,14 @@ class UserTable(Base):
             )
 
             return (await session.execute(user_query)).scalar()
+
+
+@dataclass(slots=True)
+class UserRow:
+    """What the world needs of a user, see `UserTable.query_rows_by_ids`."""
+
+    id: int
+    username: str
+    nickname: str
+    mascot_id: int | None
+    avatar: AvatarRow
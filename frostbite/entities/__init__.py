@@ -1,4 +1,8 @@
+import asyncio
 from typing import Any, overload
+from frostbite.core.cache import LocalCache, local_caches
+from frostbite.core.config import LOCAL_CACHE_CAPACITY, REDIS_AUTO_BATCH
+from frostbite.core.realtime.batch import RedisBatch, auto_batcher
 from frostbite.core.realtime.redis import get_redis_pool
 
 
@@ -7,7 +11,7 @@ class BaseEntity:
 
     @classmethod
     def __get_cache_prefix(cls) -> str:
-        prefix = (BaseEntity.__prefix__ + ":") if BaseEntity.__prefix__ else ""
+        prefix = (cls.__prefix__ + ":") if cls.__prefix__ else ""
 
         return prefix + cls.__name__ + ":"
 
@@ -42,22 +46,35 @@ class BaseEntity:
     async def set_cache(cls, key: str, value: Any):
         raise NotImplementedError
 
+    @classmethod
+    async def delete_cache(cls, key: str):
+        raise NotImplementedError
+
 
 class Entity(BaseEntity):
     @classmethod
     async def cache_exists(cls, cache_key: str) -> bool:
-        key = cls.get_cache_key(cache_key)
-        return await get_redis_pool().exists(key)
+        return bool(await cls.execute_cache(cache_key, command="exists"))
 
     @classmethod
     async def execute_cache(cls, key: str, /, *subkeys, command: str):
         key = cls.get_cache_key(key)
-        redis = get_redis_pool()
 
-        if not hasattr(redis, command):
+        if REDIS_AUTO_BATCH:
+            return await auto_batcher.queue(command, key, *subkeys)
+
+        method = getattr(get_redis_pool(), command, None)
+        if method is None:
             raise ValueError(f"Redis pool has no command: {command}")
 
-        return await getattr(redis, command)(key, *subkeys)
+        return await method(key, *subkeys)
+
+    @classmethod
+    def queue_cache(
+        cls, batch: RedisBatch, key: str, /, *subkeys, command: str
+    ) -> asyncio.Future:
+        """Queue a command in `batch`, the future resolves once it is executed."""
+        return batch.queue(command, cls.get_cache_key(key), *subkeys)
 
     @classmethod
     async def get_cache(cls, key: str, /, *subkeys, command: str):
@@ -67,22 +84,48 @@ class Entity(BaseEntity):
     async def set_cache(cls, key: str, /, *subkeys, command: str):
         return await cls.execute_cache(key, *subkeys, command=command)
 
-
-local_cache = {}
+    @classmethod
+    async def delete_cache(cls, key: str):
+        return await cls.execute_cache(key, command="delete")
 
 
 class LocalEntity(BaseEntity):
+    """Entity cached in this process only.
+
+    Each class gets its own LRU cache, bounded by `__capacity__` entries and
+    optionally `__max_bytes__` bytes, with entries expiring after `__ttl__`
+    seconds unless it is None.
+    """
+
+    __capacity__: int | None = LOCAL_CACHE_CAPACITY
+    __ttl__: float | None = None
+    __max_bytes__: int | None = None
+
+    @classmethod
+    def get_local_cache(cls) -> LocalCache:
+        return local_caches.get(
+            cls.__name__,
+            capacity=cls.__capacity__,
+            ttl=cls.__ttl__,
+            max_bytes=cls.__max_bytes__,
+        )
+
     @classmethod
     async def cache_exists(cls, cache_key: str) -> bool:
         key = cls.get_cache_key(cache_key)
-        return key in local_cache
+        return cls.get_local_cache().contains(key)
 
     @classmethod
     async def get_cache(cls, key: str):
         key = cls.get_cache_key(key)
-        return local_cache[key]
+        return cls.get_local_cache().get(key)
 
     @classmethod
-    async def set_cache(cls, key: str, value: Any):
+    async def set_cache(cls, key: str, value: Any, *, ttl: float | None = None):
+        key = cls.get_cache_key(key)
+        cls.get_local_cache().set(key, value, ttl=ttl)
+
+    @classmethod
+    async def delete_cache(cls, key: str):
         key = cls.get_cache_key(key)
-        local_cache[key] = value
+        cls.get_local_cache().delete(key)
@@ -1,17 +1,12 @@
+from frostbite.core.catalog import get_catalog
 from frostbite.entities import LocalEntity
 
 
 class AvatarEntity(LocalEntity):
     @staticmethod
     async def check_color_exists(color_id: int) -> bool:
-        colors = await AvatarEntity.get_all_colors()
-        return color_id in colors
+        return color_id in get_catalog().colors
 
     @staticmethod
-    async def get_all_colors() -> set[int]:
-        colors_cache_exists = await AvatarEntity.cache_exists("colors")
-        if not colors_cache_exists:
-            # TODO: Populate the cache from database
-            raise NotImplementedError()
-
-        return await AvatarEntity.get_cache("colors")
+    async def get_all_colors() -> frozenset[int]:
+        return get_catalog().colors
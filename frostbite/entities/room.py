@@ -1,20 +1,149 @@
+from frostbite.core.realtime.batch import RedisBatch
 from frostbite.entities.world import BaseWorldEntity
+from frostbite.models.player import Player, PlayerState
+from frostbite.models.user import User
 
 
 class RoomEntity(BaseWorldEntity):
+    """Rosters of the room instances of this world, shared by all of its
+    workers.
+
+    Each instance has a set of player ids and two hashes by sid, one with
+    the `User` of each player and one with their `PlayerState`, so movement
+    only rewrites the latter. The number of players of every instance is
+    kept in a single hash, where a slot is reserved before joining an
+    instance and freed along with the player.
+    """
+
+    @staticmethod
+    def get_instance_name(room_id: int, instance: int = 0) -> str:
+        return str(room_id) if instance == 0 else f"{room_id}#{instance}"
+
     @classmethod
-    async def check_player_exists(cls, player_id: int, *, room_id: int) -> bool:
-        colors = await cls.get_all_player_ids(room_id=room_id)
-        return player_id in colors
+    async def get_population(cls) -> dict[tuple[int, int], int]:
+        """Get the number of players of every instance, by room id and
+        instance number."""
+        population = await cls.get_cache("rooms.population", command="hgetall")
+
+        counts: dict[tuple[int, int], int] = {}
+        for name, count in population.items():
+            room_id, _, instance = name.decode().partition("#")
+            counts[(int(room_id), int(instance or 0))] = int(count)
+
+        return counts
 
     @classmethod
-    async def get_all_player_ids(cls, *, room_id: int) -> set[int]:
-        key = f"rooms.{room_id}"
+    async def reserve_slot(
+        cls, *, room_id: int, instance: int = 0, capacity: int
+    ) -> int | None:
+        """Take a slot in an instance, unless it already holds `capacity`
+        players.
+
+        Returns the new number of players, or None if the instance is full.
+        """
+        name = cls.get_instance_name(room_id, instance)
+        count = await cls.set_cache("rooms.population", name, 1, command="hincrby")
+        if count > capacity:
+            await cls.release_slot(room_id=room_id, instance=instance)
+            return None
 
-        colors_cache_exists = await cls.cache_exists(key)
-        if not colors_cache_exists:
-            # TODO: Populate the cache from database
-            raise NotImplementedError()
+        return count
 
-        players = await cls.get_cache(key, command="smembers")
+    @classmethod
+    async def release_slot(cls, *, room_id: int, instance: int = 0) -> int:
+        name = cls.get_instance_name(room_id, instance)
+        return await cls.set_cache("rooms.population", name, -1, command="hincrby")
+
+    @classmethod
+    async def check_player_exists(
+        cls, player_id: int, *, room_id: int, instance: int = 0
+    ) -> bool:
+        colors = await cls.get_all_player_ids(room_id=room_id, instance=instance)
+        return player_id in colors
+
+    @classmethod
+    async def get_all_player_ids(cls, *, room_id: int, instance: int = 0) -> set[int]:
+        name = cls.get_instance_name(room_id, instance)
+        players = await cls.get_cache(f"rooms.{name}", command="smembers")
         return set(map(int, players))
+
+    @classmethod
+    async def get_players(cls, *, room_id: int, instance: int = 0) -> dict[str, Player]:
+        name = cls.get_instance_name(room_id, instance)
+        async with RedisBatch(transaction=True) as batch:
+            users = cls.queue_cache(batch, f"rooms.{name}.users", command="hgetall")
+            states = cls.queue_cache(batch, f"rooms.{name}.states", command="hgetall")
+
+        players: dict[str, Player] = {}
+        player_states = states.result()
+        for sid, user in users.result().items():
+            state = player_states.get(sid)
+            if state is None:
+                continue
+
+            state = PlayerState.model_validate_json(state)
+            players[sid.decode()] = Player(
+                user=User.model_validate_json(user),
+                x=state.x,
+                y=state.y,
+                action=state.action,
+            )
+
+        return players
+
+    @classmethod
+    async def add_player(
+        cls,
+        sid: str,
+        user: User,
+        state: PlayerState,
+        *,
+        room_id: int,
+        instance: int = 0,
+    ) -> None:
+        name = cls.get_instance_name(room_id, instance)
+        async with RedisBatch(transaction=True) as batch:
+            cls.queue_cache(batch, f"rooms.{name}", user.id, command="sadd")
+            cls.queue_cache(
+                batch,
+                f"rooms.{name}.users",
+                sid,
+                user.model_dump_json(),
+                command="hset",
+            )
+            cls.queue_cache(
+                batch,
+                f"rooms.{name}.states",
+                sid,
+                state.model_dump_json(),
+                command="hset",
+            )
+
+    @classmethod
+    async def update_players(
+        cls, states: dict[str, PlayerState], *, room_id: int, instance: int = 0
+    ) -> None:
+        """Update the state of several players of an instance at once, by sid."""
+        name = cls.get_instance_name(room_id, instance)
+        mapping = {sid: state.model_dump_json() for sid, state in states.items()}
+        await cls.set_cache(f"rooms.{name}.states", None, None, mapping, command="hset")
+
+    @classmethod
+    async def update_user(
+        cls, sid: str, user: User, *, room_id: int, instance: int = 0
+    ) -> None:
+        name = cls.get_instance_name(room_id, instance)
+        await cls.set_cache(
+            f"rooms.{name}.users", sid, user.model_dump_json(), command="hset"
+        )
+
+    @classmethod
+    async def remove_player(
+        cls, sid: str, user_id: int, *, room_id: int, instance: int = 0
+    ) -> None:
+        name = cls.get_instance_name(room_id, instance)
+        async with RedisBatch(transaction=True) as batch:
+            cls.queue_cache(batch, f"rooms.{name}", user_id, command="srem")
+            cls.queue_cache(batch, f"rooms.{name}.users", sid, command="hdel")
+            cls.queue_cache(batch, f"rooms.{name}.states", sid, command="hdel")
+            cls.queue_cache(batch, "rooms.population", name, -1, command="hincrby")
@@ -0,0 +1,35 @@
+from frostbite.core.avatar_store import avatar_store
+from frostbite.database.schema.user import UserRow, UserTable
+from frostbite.entities import LocalEntity
+
+
+class UserEntity(LocalEntity):
+    """Snapshots of the users connected to this process.
+
+    A snapshot is loaded when the user connects and dropped when they
+    disconnect. Handlers that mutate a user must `refresh` it afterwards.
+    Snapshots are `UserRow`s, only the columns the world packets need.
+    """
+
+    @classmethod
+    async def get_user(cls, user_id: int) -> UserRow | None:
+        key = str(user_id)
+        if await cls.cache_exists(key):
+            return await cls.get_cache(key)
+
+        return await cls.refresh(user_id)
+
+    @classmethod
+    async def refresh(cls, user_id: int) -> UserRow | None:
+        user = await UserTable.query_row_by_id(user_id)
+        if user is None:
+            await cls.invalidate(user_id)
+        else:
+            avatar_store.overlay(user)
+            await cls.set_cache(str(user_id), user)
+
+        return user
+
+    @classmethod
+    async def invalidate(cls, user_id: int) -> None:
+        await cls.delete_cache(str(user_id))
@@ -14,11 +14,19 @@ from fastapi.params import Depends as ParamDepends
 from jwt import ExpiredSignatureError
 from loguru import logger
 from pydantic import ValidationError
+from pydantic_core import SchemaValidator
 from socketio.exceptions import ConnectionRefusedError
 
-from frostbite.core.config import DEFAULT_WORLD_NAMESPACE
+from frostbite.core.avatar_store import avatar_store
+from frostbite.core.config import (
+    DEFAULT_WORLD_NAMESPACE,
+    PACKET_MAILBOX_DEPTH,
+    PACKET_MAILBOX_OVERFLOW,
+)
 from frostbite.core.constants.close import CloseCode
 from frostbite.core.constants.events import EventEnum
+from frostbite.core.mailbox import PacketMailboxes
+from frostbite.core.metrics import PacketOutcome, packet_metrics
 from frostbite.core.socket import (
     SocketCriticalException,
     SocketException,
@@ -26,14 +34,21 @@ from frostbite.core.socket import (
     send_error,
     sio,
 )
-from frostbite.database.schema.user import UserTable
+from frostbite.database.schema.user import UserRow
+from frostbite.entities.user import UserEntity
 from frostbite.events import dispatch as global_dispatch
 from frostbite.models.packet import Packet
 from frostbite.utils.auth import get_current_user_id, get_oauth_data
-from frostbite.utils.dependencies import solve_dependencies
+from frostbite.utils.dependencies import (
+    DependencyPlan,
+    compile_dependencies,
+    execute_plan,
+    inline_dependency,
+)
 
 __all__ = (
     "packet_handlers",
+    "packet_mailboxes",
     "get_event",
     "get_session",
     "get_user_id",
@@ -64,6 +79,7 @@ class DelayedInjection:
 class PacketHandler:
     def __init__(self):
         self._registry: dict[str, dict[str, Callable]] = {}
+        self._volatile: dict[str, set[str]] = {}
 
     def register(
         self,
@@ -72,6 +88,7 @@ class PacketHandler:
         *,
         dependencies: list[ParamDepends] | None = None,
         namespace: str = DEFAULT_WORLD_NAMESPACE,
+        volatile: bool = False,
     ):
         """Register a handler for the given packet.
 
@@ -88,10 +105,13 @@ class PacketHandler:
             :param func: The function to be registered as a handler.  Typically, you would use `register` as a decorator and omit this argument.
             :param dependencies: A list of dependencies to include within the handler.
             :param namespace: The namespace to register this handler under. Defaults to the default world namespace.
+            :param volatile: Whether packets for this op may be dropped when the connection's mailbox overflows, because a later packet supersedes them.
         """
 
         def wrapped(_func):
-            self._register_handler(op, _func, dependencies, namespace=namespace)
+            self._register_handler(
+                op, _func, dependencies, namespace=namespace, volatile=volatile
+            )
             return _func
 
         if func is None:
@@ -110,36 +130,59 @@ class PacketHandler:
         """
         self._unregister_handler(op, func, namespace=namespace)
 
+    def is_volatile(self, op: str, namespace: str = DEFAULT_WORLD_NAMESPACE) -> bool:
+        return op in self._volatile.get(namespace, ())
+
     async def handle(
-        self, sid: str, packet: Packet, *, namespace: str = DEFAULT_WORLD_NAMESPACE
+        self,
+        sid: str,
+        op: str,
+        data: Any,
+        *,
+        namespace: str = DEFAULT_WORLD_NAMESPACE,
     ) -> None:
-        _event.set((sid, packet, namespace))
-
-        handler = self._get_handler_for_event(event_name=packet.op, namespace=namespace)
+        handler = self._get_handler_for_event(event_name=op, namespace=namespace)
 
         if handler is None:
-            logger.warning(f"No handler found for {packet.op}")
+            logger.warning(f"No handler found for {op}")
+            # unknown ops are bucketed together to keep the label set bounded
+            packet_metrics.get(namespace, "*").outcomes[PacketOutcome.UNHANDLED] += 1
             return
 
+        metrics = packet_metrics.get(namespace, op)
+        started = metrics.start()
+        outcome = PacketOutcome.EXCEPTION
+        try:
+            outcome = await self._dispatch(sid, handler, op, data, namespace=namespace)
+        finally:
+            metrics.finish(started, outcome)
+
+    async def _dispatch(
+        self, sid: str, handler: Callable, op: str, data: Any, *, namespace: str
+    ) -> PacketOutcome:
         async with AsyncExitStack() as cm:
             # resolve dependencies
             dependant: Dependant = getattr(handler, "__dependant__")
+            plan: DependencyPlan = getattr(handler, "__plan__")
+            validator: SchemaValidator = getattr(handler, "__packet_validator__")
 
             if not dependant.call:
-                return
+                return PacketOutcome.OK
 
             try:
+                # validate straight into the packet type the handler declares
+                packet = validator.validate_python({"op": op, "d": data})
+                _event.set((sid, packet, namespace))
+
                 # TODO: mock request object? or access an internal API to fetch it
-                solved = await solve_dependencies(
-                    dependant=dependant, async_exit_stack=cm
-                )
+                values = await execute_plan(plan, async_exit_stack=cm)
 
                 if inspect.iscoroutinefunction(dependant.call):
-                    await dependant.call(**solved.values)
+                    await dependant.call(**values)
                 else:
                     loop = asyncio.get_event_loop()
                     await loop.run_in_executor(
-                        None, functools.partial(dependant.call, **solved.values)
+                        None, functools.partial(dependant.call, **values)
                     )
             except ValidationError as e:
                 logger.opt(exception=e).error(e)
@@ -150,14 +193,20 @@ class PacketHandler:
                     ),
                     namespace=namespace,
                 )
+                return PacketOutcome.INVALID
             except SocketCriticalException as e:
                 await send_and_disconnect(sid, e, namespace=namespace)
+                return PacketOutcome.CRITICAL
             except SocketException as e:
                 await send_error(sid, e, namespace=namespace)
+                return PacketOutcome.ERROR
             except Exception as e:
                 logger.opt(exception=e).error(
                     "An error occurred when dispatching a packet"
                 )
+                return PacketOutcome.EXCEPTION
+
+        return PacketOutcome.OK
 
     def _register_handler(
         self,
@@ -166,6 +215,7 @@ class PacketHandler:
         dependencies: list[ParamDepends] | None = None,
         *,
         namespace: str = DEFAULT_WORLD_NAMESPACE,
+        volatile: bool = False,
     ):
         if not isinstance(event_name, str):
             event_name = str(event_name)
@@ -180,6 +230,9 @@ class PacketHandler:
 
         path_format = f"packet:{event_name}"
 
+        packet_type = self._get_packet_type(func)
+        setattr(func, "__packet_validator__", packet_type.__pydantic_validator__)
+
         self._inject_params(func)
 
         dependant = get_dependant(path=path_format, call=func)
@@ -190,9 +243,26 @@ class PacketHandler:
                 get_parameterless_sub_dependant(depends=depends, path=path_format),
             )
         setattr(func, "__dependant__", dependant)
+        # flatten the dependant tree once, so dispatching a packet doesn't
+        # have to walk it again
+        setattr(func, "__plan__", compile_dependencies(dependant))
 
         handlers[event_name] = func
 
+        volatile_ops = self._volatile.setdefault(namespace, set())
+        if volatile:
+            volatile_ops.add(event_name)
+        else:
+            volatile_ops.discard(event_name)
+
+    def _get_packet_type(self, func: Callable) -> type[Packet]:
+        for param in inspect.signature(func).parameters.values():
+            annotation = param.annotation
+            if isinstance(annotation, type) and issubclass(annotation, Packet):
+                return annotation
+
+        return Packet
+
     def _get_injection_params(self) -> dict[Any, Any]:
         return {
             "sid": SidDep,
@@ -261,6 +331,7 @@ class PacketHandler:
             return
 
         del handlers[event_name]
+        self._volatile.get(namespace, set()).discard(event_name)
 
         if len(handlers) == 0:
             del self._registry[namespace]
@@ -274,12 +345,13 @@ async def get_session(namespace: str = DEFAULT_WORLD_NAMESPACE) -> dict[str, Any
 SessionDep = Annotated[dict[str, Any], Depends(get_session)]
 
 
+@inline_dependency
 def get_user_id(session: Annotated[dict[str, Any], Depends(get_session)]) -> int:
     return session["user_id"]
 
 
-async def get_current_user(user_id: Annotated[int, Depends(get_user_id)]) -> UserTable:
-    user = await UserTable.query_by_id(user_id)
+async def get_current_user(user_id: Annotated[int, Depends(get_user_id)]) -> UserRow:
+    user = await UserEntity.get_user(user_id)
 
     if user is None or user.id != user_id:
         raise SocketCriticalException(
@@ -289,10 +361,12 @@ async def get_current_user(user_id: Annotated[int, Depends(get_user_id)]) -> Use
     return user
 
 
+@inline_dependency
 def get_event() -> Event:
     return _event.get()
 
 
+@inline_dependency
 def get_sid(event: Annotated[Event, Depends(get_event)]) -> str:
     return event[0]
 
@@ -300,6 +374,7 @@ def get_sid(event: Annotated[Event, Depends(get_event)]) -> str:
 SidDep = Annotated[str, Depends(get_sid)]
 
 
+@inline_dependency
 def get_packet(event: Annotated[Event, Depends(get_event)]) -> Packet:
     return event[1]
 
@@ -307,6 +382,7 @@ def get_packet(event: Annotated[Event, Depends(get_event)]) -> Packet:
 PacketDep = Annotated[Packet, Depends(get_packet)]
 
 
+@inline_dependency
 def get_namespace(event: Annotated[Event, Depends(get_event)]) -> str:
     return event[2]
 
@@ -315,13 +391,23 @@ NamespaceDep = Annotated[str, Depends(get_namespace)]
 
 
 def get_custom_packet(cls=Packet):
+    @inline_dependency
     def _wrap(p: PacketDep) -> Packet:
+        if isinstance(p, cls):
+            return p
+
         return cls.model_validate(p.model_dump())
 
     return _wrap
 
 
 packet_handlers = PacketHandler()
+packet_mailboxes = PacketMailboxes(
+    packet_handlers.handle,
+    depth=PACKET_MAILBOX_DEPTH,
+    policy=PACKET_MAILBOX_OVERFLOW,
+    is_volatile=packet_handlers.is_volatile,
+)
 
 
 async def authenticate(token: str) -> int:
@@ -345,6 +431,13 @@ async def connect(sid: str, environ: dict[str, Any], auth: dict[str, Any]) -> bo
         return False
 
     user_id = await authenticate(token)
+
+    # warm the user snapshot, most packets are served from it from now on
+    if await UserEntity.refresh(user_id) is None:
+        raise ConnectionRefusedError(
+            CloseCode.AUTHENTICATION_FAILED, "Authentication failed"
+        )
+
     logger.info(f"User {user_id} connected")
 
     try:
@@ -353,6 +446,7 @@ async def connect(sid: str, environ: dict[str, Any], auth: dict[str, Any]) -> bo
     except KeyError:
         # probably disconnected? ignore
         logger.error(f"User {user_id} disconnected before session could be saved")
+        await UserEntity.invalidate(user_id)
         return False
 
     global_dispatch(EventEnum.USER_AUTH, sid)
@@ -362,15 +456,24 @@ async def connect(sid: str, environ: dict[str, Any], auth: dict[str, Any]) -> bo
 
 @sio.event(namespace=DEFAULT_WORLD_NAMESPACE)
 async def message(sid: str, event_name: str, data: Any) -> None:
-    packet = Packet(op=event_name, d=data)
-    logger.info(f"Dispatching packet for {packet.op} with data {packet.d}")
-    await packet_handlers.handle(sid, packet, namespace=DEFAULT_WORLD_NAMESPACE)
+    logger.info(f"Queueing packet for {event_name} with data {data}")
+    await packet_mailboxes.put(sid, event_name, data, namespace=DEFAULT_WORLD_NAMESPACE)
 
 
 @sio.event
 async def disconnect(sid: str) -> None:
+    packet_mailboxes.close(sid)
+
     session = await sio.get_session(sid)
     user_id = session["user_id"]
 
     logger.info(f"User {user_id} disconnected")
     global_dispatch(EventEnum.USER_DISCONNECT, sid, session, sio.rooms(sid))
+
+    try:
+        await avatar_store.flush([user_id])
+    except Exception:
+        # still pending, written with the next flush
+        logger.exception(f"Failed to write the avatar of user {user_id}")
+
+    await UserEntity.invalidate(user_id)
@@ -2,23 +2,25 @@ from typing import Annotated
 from fastapi import Depends
 from pydantic import BaseModel
 from frostbite.core.config import DEFAULT_WORLD_NAMESPACE
-from frostbite.core.socket import SocketErrorEnum, SocketException, send_packet, sio
+from frostbite.core.locations import player_locations
+from frostbite.core.socket import SocketErrorEnum, SocketException, send_packet
 from frostbite.handlers import NamespaceDep, SidDep, packet_handlers
 from frostbite.handlers.room import get_current_room, remove_from_room
 from frostbite.models.packet import Packet
+from frostbite.utils.dependencies import inline_dependency
 
 
+@inline_dependency
 def get_current_game(
     sid: SidDep,
     *,
     namespace: NamespaceDep = DEFAULT_WORLD_NAMESPACE,
 ) -> str:
-    rooms = sio.manager.get_rooms(sid, namespace)
-    if rooms is not None:
-        for room in filter(lambda k: k.startswith("games:"), rooms):
-            return room
+    game_key = player_locations.get_game(sid, namespace=namespace)
+    if game_key is None:
+        raise SocketException(SocketErrorEnum.GAME_NOT_STARTED, "Not in a game")
 
-    raise SocketException(SocketErrorEnum.GAME_NOT_STARTED, "Not in a game")
+    return game_key
 
 
 class GameStartData(BaseModel):
@@ -33,6 +35,7 @@ async def add_to_game(game_key: str, sid: str, *, namespace: str) -> None:
     game_id = game_key.split(":")[1]
 
     # await sio.enter_room(sid, game_key, namespace=namespace)
+    player_locations.set_game(sid, game_key, namespace=namespace)
 
     await send_packet(
         sid,
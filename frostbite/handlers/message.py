@@ -2,6 +2,8 @@ from enum import StrEnum
 from typing import Annotated, Literal
 from fastapi import Depends
 from pydantic import BaseModel
+from frostbite.core.catalog import get_catalog
+from frostbite.core.interest import area_of_interest
 from frostbite.core.socket import send_packet
 from frostbite.handlers import get_user_id, packet_handlers
 from frostbite.handlers.room import get_current_room
@@ -45,6 +47,7 @@ class MessageCreateResponse(BaseModel):
 
 @packet_handlers.register("message:create")
 async def handle_message_create(
+    sid: str,
     packet: Packet[
         TextMessageData | EmojiMessageData | JokeMessageData | TourMessageData
     ],
@@ -52,6 +55,9 @@ async def handle_message_create(
     room_key: Annotated[str, Depends(get_current_room)],
     namespace: str,
 ):
+    if packet.d.type == MessageType.JOKE and packet.d.joke not in get_catalog().jokes:
+        return
+
     if packet.d.type == MessageType.TEXT:
         data = MessageCreateResponse(player_id=user_id, type=packet.d.type, message=packet.d.message, banned=False)  # type: ignore
     elif packet.d.type == MessageType.EMOJI:
@@ -63,4 +69,14 @@ async def handle_message_create(
             player_id=user_id, type=packet.d.type, banned=False
         )
 
-    await send_packet(room_key, "message:create", data, namespace=namespace)
+    recipients = None
+    if packet.d.type == MessageType.EMOJI:
+        # emotes are only shown above the player, so they stay local
+        recipients = area_of_interest.recipients(room_key, sid, namespace=namespace)
+
+    await send_packet(
+        room_key if recipients is None else recipients,
+        "message:create",
+        data,
+        namespace=namespace,
+    )
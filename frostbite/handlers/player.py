@@ -1,10 +1,15 @@
 import datetime
-from typing import Annotated
+from typing import Annotated, Any
 from fastapi import Depends
+from frostbite.core.config import ACTION_TICK_RATE, ROSTER_SYNC_RATE
 from frostbite.core.constants.action_type import ActionType
-from frostbite.core.socket import send_packet, sio
+from frostbite.core.interest import area_of_interest
+from frostbite.core.room_state import PlayerRecord, RoomState, room_states
+from frostbite.core.socket import send_packet
+from frostbite.core.tick import TickCoalescer
+from frostbite.entities.room import RoomEntity
 from frostbite.handlers import get_user_id, packet_handlers
-from frostbite.handlers.room import get_current_room
+from frostbite.handlers.room import get_current_room_state
 from frostbite.models.action import Action
 from frostbite.models.packet import Packet
 
@@ -15,16 +20,57 @@ VOLATILE_TYPES = (
     ActionType.THROW,
     ActionType.JUMP,
 )
+# one-shot actions, every one of them is broadcast even when batching
+EVENT_TYPES = (
+    ActionType.WAVE,
+    ActionType.THROW,
+    ActionType.JUMP,
+)
 
 
-@packet_handlers.register("player:action")
+async def flush_actions(namespace: str, room_key: str, actions: list[Action]) -> None:
+    await send_packet(room_key, "player:actions", actions, namespace=namespace)
+
+
+action_ticker = (
+    TickCoalescer[Action](ACTION_TICK_RATE, flush_actions)
+    if ACTION_TICK_RATE > 0
+    else None
+)
+
+
+async def flush_roster(namespace: str, room_key: str, sids: list[str]) -> None:
+    state = room_states.get(room_key, namespace=namespace)
+    if state is None:
+        return
+
+    states = {}
+    for sid in sids:
+        record = state.get(sid)
+        # players that left since are already gone from the roster
+        if record is not None:
+            states[sid] = record.to_state()
+
+    if states:
+        await RoomEntity.update_players(
+            states, room_id=state.room_id, instance=state.instance
+        )
+
+
+roster_ticker = (
+    TickCoalescer[str](ROSTER_SYNC_RATE, flush_roster) if ROSTER_SYNC_RATE > 0 else None
+)
+
+
+@packet_handlers.register("player:action", volatile=True)
 async def handle_player_action(
     sid: str,
     packet: Packet[Action],
     user_id: Annotated[int, Depends(get_user_id)],
-    room_key: Annotated[str, Depends(get_current_room)],
+    state: Annotated[RoomState, Depends(get_current_room_state)],
     namespace: str,
 ):
+    room_key = state.room_key
     action = Action(
         player_id=user_id,
         type=packet.d.type,
@@ -35,24 +81,72 @@ async def handle_player_action(
         since=datetime.datetime.now(datetime.timezone.utc).timestamp() * 1000,
     )
 
-    async with sio.session(sid) as session:
-        if packet.d.type == ActionType.WADDLE:
-            current_x = packet.d.to_x
-            current_y = packet.d.to_y
-        elif packet.d.x is not None and packet.d.y is not None:
-            current_x = packet.d.x
-            current_y = packet.d.y
+    current_x = current_y = None
+    if packet.d.type == ActionType.WADDLE:
+        current_x = packet.d.to_x
+        current_y = packet.d.to_y
+    elif packet.d.x is not None and packet.d.y is not None:
+        current_x = packet.d.x
+        current_y = packet.d.y
+
+    previous = state.position(sid)
 
-        if not action.type in VOLATILE_TYPES:
-            session["action"] = action
+    state.update(
+        sid,
+        x=current_x,
+        y=current_y,
+        action=None if action.type in VOLATILE_TYPES else action,
+    )
+    if current_x is not None or action.type not in VOLATILE_TYPES:
+        if roster_ticker is not None:
+            roster_ticker.push(room_key, sid, namespace=namespace, key=sid)
+        else:
+            await flush_roster(namespace, room_key, [sid])
 
-        if current_x is not None and current_y is not None:
-            session["x"] = current_x
-            session["y"] = current_y
+    visible = set[str]()
+    if current_x is not None and current_y is not None:
+        visible = area_of_interest.update(
+            room_key, sid, current_x, current_y, namespace=namespace
+        )
 
-    await send_packet(
+    if action_ticker is not None:
+        action_ticker.push(
+            room_key,
+            action,
+            namespace=namespace,
+            key=None if action.type in EVENT_TYPES else user_id,
+        )
+        return
+
+    recipients = area_of_interest.recipients(
         room_key,
+        sid,
+        *(p for p in (previous, state.position(sid)) if p is not None),
+        namespace=namespace,
+    )
+    await send_packet(
+        room_key if recipients is None else recipients,
         "player:action",
         action,
         namespace=namespace,
     )
+
+    for other_sid in visible:
+        other = state.get(other_sid)
+        if other is not None:
+            await send_catch_up_action(sid, other, namespace=namespace)
+
+
+async def send_catch_up_action(
+    sid: str, other: PlayerRecord, *, namespace: str
+) -> None:
+    """Tell `sid` where a player that just came into view is, since it
+    missed their movement while they were out of view."""
+    action = other.action
+    update: dict[str, Any] = {"player_id": other.user.id}
+    if action.x is None or action.y is None:
+        update.update(x=other.x, y=other.y)
+
+    await send_packet(
+        sid, "player:action", action.model_copy(update=update), namespace=namespace
+    )
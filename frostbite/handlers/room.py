@@ -1,40 +1,70 @@
 import random
+from typing import Annotated
 
+from fastapi import Depends
 from fastapi_events.handlers.local import local_handler
 from fastapi_events.typing import Event
 from loguru import logger
 from pydantic import BaseModel
 
+from frostbite.core.catalog import CatalogRoom, get_catalog
 from frostbite.core.config import DEFAULT_WORLD_NAMESPACE
 from frostbite.core.constants.events import EventEnum
+from frostbite.core.interest import area_of_interest
+from frostbite.core.locations import player_locations
+from frostbite.core.occupancy import room_occupancy
+from frostbite.core.room_state import (
+    RoomState,
+    get_room_key,
+    parse_room_key,
+    room_states,
+)
 from frostbite.core.socket import (
     SocketException,
     SocketErrorEnum,
-    get_sids_in_room,
+    encode_packet,
+    send_encoded,
     send_packet,
     sio,
 )
-from frostbite.database.schema.user import UserTable
+from frostbite.core.wire import EncodedPacket
+from frostbite.entities.room import RoomEntity
+from frostbite.entities.user import UserEntity
 from frostbite.events import dispatch
 from frostbite.handlers import NamespaceDep, SidDep, get_current_user, packet_handlers
 from frostbite.models.action import Action
 from frostbite.models.packet import Packet
-from frostbite.models.player import Player
+from frostbite.models.player import Player, PlayerState
 from frostbite.models.user import User
 from frostbite.models.waddle import Waddle
+from frostbite.utils.dependencies import inline_dependency
 
 
+@inline_dependency
 def get_current_room(
     sid: SidDep,
     *,
     namespace: NamespaceDep = DEFAULT_WORLD_NAMESPACE,
 ) -> str:
-    rooms = sio.manager.get_rooms(sid, namespace)
-    if rooms is not None:
-        for room in filter(lambda k: k.startswith("rooms:"), rooms):
-            return room
+    room_key = player_locations.get_room(sid, namespace=namespace)
+    if room_key is None:
+        raise SocketException(SocketErrorEnum.NOT_IN_ROOM, "Not in a room")
+
+    return room_key
 
-    raise SocketException(SocketErrorEnum.NOT_IN_ROOM, "Not in a room")
+
+@inline_dependency
+def get_current_room_state(
+    sid: SidDep,
+    room_key: Annotated[str, Depends(get_current_room)],
+    *,
+    namespace: NamespaceDep = DEFAULT_WORLD_NAMESPACE,
+) -> RoomState:
+    state = room_states.get(room_key, namespace=namespace)
+    if state is None or sid not in state:
+        raise SocketException(SocketErrorEnum.NOT_IN_ROOM, "Not in a room")
+
+    return state
 
 
 class RoomJoinData(BaseModel):
@@ -50,24 +80,70 @@ class RoomJoinResponse(BaseModel):
 
 
 DEFAULT_ACTION = Action(type=0)
-SPAWN_ROOMS = [
-    100,  # town
-    200,  # village
-    230,  # mtn
-    300,  # plaza
-    400,  # beach
-    800,  # dock
-    801,  # forts
-    802,  # rink
-    805,  # berg
-    807,  # shack
-    809,  # forest
-    810,  # cove
-]  # TODO: get from crumbs instead and verify if full
-
-
-def get_safe_coordinates(room_id: int) -> tuple[float, float]:
-    return random.randint(473, 1247), random.randint(704, 734)
+
+
+def get_room(room_id: int) -> CatalogRoom:
+    room = get_catalog().rooms.get(room_id)
+    if room is None:
+        raise SocketException(SocketErrorEnum.ROOM_NOT_FOUND, "Room not found")
+
+    return room
+
+
+def get_safe_coordinates(room: CatalogRoom) -> tuple[float, float]:
+    return (
+        random.randint(room.safe_start_x, room.safe_end_x),
+        random.randint(room.safe_start_y, room.safe_end_y),
+    )
+
+
+async def refresh_occupancy() -> None:
+    if room_occupancy.is_stale():
+        room_occupancy.update(await RoomEntity.get_population())
+
+
+async def reserve_instance(room: CatalogRoom, instance: int) -> bool:
+    count = await RoomEntity.reserve_slot(
+        room_id=room.id, instance=instance, capacity=room.max_users
+    )
+    room_occupancy.set(room.id, instance, room.max_users if count is None else count)
+    return count is not None
+
+
+async def reserve_room(room: CatalogRoom) -> int:
+    """Reserve a slot in the least full instance of a room, opening a new
+    instance if they are all full. Returns the instance number."""
+    await refresh_occupancy()
+
+    for instance in room_occupancy.instances(room):
+        if await reserve_instance(room, instance):
+            return instance
+
+    raise SocketException(SocketErrorEnum.ROOM_FULL, "Room is full")
+
+
+async def reserve_spawn_room() -> tuple[CatalogRoom, int]:
+    """Reserve a slot in the least loaded spawn room that is not full."""
+    await refresh_occupancy()
+
+    catalog = get_catalog()
+    spawn_rooms = (catalog.rooms[room_id] for room_id in catalog.spawn_rooms)
+    for room in room_occupancy.least_loaded(spawn_rooms):
+        try:
+            return room, await reserve_room(room)
+        except SocketException:
+            # filled up since the occupancy was last read
+            continue
+
+    raise SocketException(SocketErrorEnum.ROOM_FULL, "Every spawn room is full")
+
+
+def is_joining(sid: str, room_key: str, *, namespace: str) -> bool:
+    """Whether a player being added to a room is still connected and headed
+    there, after `add_to_room` had to wait."""
+    return sio.manager.is_connected(
+        sid, namespace
+    ) and room_key == player_locations.get_room(sid, namespace=namespace)
 
 
 async def add_to_room(
@@ -77,20 +153,68 @@ async def add_to_room(
     x: float,
     y: float,
     namespace: str,
+    reserved: bool = False,
 ) -> None:
-    room_id = int(room_key.split(":")[-1])
+    """Add a player to a room instance, raising ROOM_FULL if it is full.
+
+    With `reserved`, the caller already took a slot with `reserve_room`.
+    """
+    room_id, instance = parse_room_key(room_key)
+    if not reserved and not await reserve_instance(get_room(room_id), instance):
+        raise SocketException(SocketErrorEnum.ROOM_FULL, "Room is full")
 
-    async with sio.session(sid) as session:
-        session["room_id"] = room_id
-        session["x"] = x
-        session["y"] = y
-        session["action"] = DEFAULT_ACTION
+    # recorded before anything else is awaited, so that a disconnect from now
+    # on knows which room to clean up. Players go back to a room once they
+    # leave a game.
+    player_locations.set_game(sid, None, namespace=namespace)
+    player_locations.set_room(sid, room_key, namespace=namespace)
+
+    try:
+        async with sio.session(sid) as session:
+            session["room_id"] = room_id
+            user_id = session["user_id"]
+
+        user = await User.from_table(await get_current_user(user_id))
+    except BaseException:
+        await abandon_room(room_key, sid, namespace=namespace)
+        raise
+
+    if not is_joining(sid, room_key, namespace=namespace):
+        # disconnected meanwhile, and nothing was added for the cleanup to find
+        await abandon_room(room_key, sid, namespace=namespace)
+        return
+
+    state = room_states.join(
+        room_key, sid, user, x=x, y=y, action=DEFAULT_ACTION, namespace=namespace
+    )
+    # frees the slot again when the player is removed
+    await RoomEntity.add_player(
+        sid,
+        user,
+        PlayerState(x=x, y=y, action=DEFAULT_ACTION),
+        room_id=state.room_id,
+        instance=state.instance,
+    )
+
+    if not is_joining(sid, room_key, namespace=namespace):
+        # the disconnect cleanup already removed the player
+        return
 
     await sio.enter_room(sid, room_key, namespace=namespace)
+    area_of_interest.update(room_key, sid, x, y, namespace=namespace)
 
     dispatch(EventEnum.ROOM_JOIN, sid, room_key, namespace)
 
 
+async def abandon_room(room_key: str, sid: str, *, namespace: str) -> None:
+    """Give up joining a room before the player was added to it."""
+    if player_locations.get_room(sid, namespace=namespace) == room_key:
+        player_locations.set_room(sid, None, namespace=namespace)
+
+    room_id, instance = parse_room_key(room_key)
+    await RoomEntity.release_slot(room_id=room_id, instance=instance)
+
+
 async def remove_from_room(
     room_key: str,
     sid: str,
@@ -98,6 +222,15 @@ async def remove_from_room(
     namespace: str,
 ) -> None:
     await sio.leave_room(sid, room_key, namespace=namespace)
+    if player_locations.get_room(sid, namespace=namespace) == room_key:
+        player_locations.set_room(sid, None, namespace=namespace)
+    area_of_interest.remove(room_key, sid, namespace=namespace)
+    record = room_states.leave(room_key, sid, namespace=namespace)
+    if record is not None:
+        room_id, instance = parse_room_key(room_key)
+        await RoomEntity.remove_player(
+            sid, record.user.id, room_id=room_id, instance=instance
+        )
 
     dispatch(EventEnum.ROOM_LEAVE, sid, room_key, namespace)
 
@@ -109,64 +242,84 @@ async def handle_room_join(
     namespace: str,
 ):
     try:
-        room = get_current_room(sid, namespace=namespace)
-        await remove_from_room(room, sid, namespace=namespace)
+        current = get_current_room(sid, namespace=namespace)
     except SocketException:
-        pass
+        current = None
+
+    # take a slot in the new room first, so a full room leaves the player
+    # where they are
+    if packet.d.room_id is None:
+        room, instance = await reserve_spawn_room()
+    else:
+        room = get_room(packet.d.room_id)
+        if current is not None and parse_room_key(current)[0] == room.id:
+            # rejoining, free the slot held in it first
+            await remove_from_room(current, sid, namespace=namespace)
+            current = None
+
+        instance = await reserve_room(room)
 
-    room_id = (
-        packet.d.room_id if packet.d.room_id is not None else random.choice(SPAWN_ROOMS)
+    try:
+        if current is not None:
+            await remove_from_room(current, sid, namespace=namespace)
+
+        safe = get_safe_coordinates(room)
+        x = packet.d.x or safe[0]
+        y = packet.d.y or safe[1]
+    except BaseException:
+        await RoomEntity.release_slot(room_id=room.id, instance=instance)
+        raise
+
+    # the slot is add_to_room's to release from here on
+    await add_to_room(
+        get_room_key(room.id, instance),
+        sid,
+        x=x,
+        y=y,
+        namespace=namespace,
+        reserved=True,
     )
-    safe = get_safe_coordinates(room_id)
-    x = packet.d.x or safe[0]
-    y = packet.d.y or safe[1]
 
-    await add_to_room(f"rooms:{room_id}", sid, x=x, y=y, namespace=namespace)
+
+def encode_room_join(state: RoomState) -> EncodedPacket:
+    return encode_packet(
+        "room:join",
+        RoomJoinResponse(room_id=state.room_id, players=state.roster(), waddles=[]),
+    )
 
 
 @local_handler.register(event_name=str(EventEnum.ROOM_JOIN))
 async def on_room_join(event: Event) -> None:
     _, (sid, room_key, namespace) = event
 
-    session = await sio.get_session(sid)
-    player = Player(
-        user=await User.from_table(await get_current_user(session["user_id"])),
-        x=session["x"],
-        y=session["y"],
-        action=session["action"],
-    )
-
-    logger.info(f"User {sid} joined {room_key} on {namespace}\n{player}")
-
-    players = [player]
-    for other_sid in get_sids_in_room(room_key, namespace):
-        if other_sid == sid:
-            continue
+    state = room_states.get(room_key, namespace=namespace)
+    record = state.get(sid) if state is not None else None
+    if state is None or record is None:
+        # left again before the event got handled
+        return
 
-        other_session = await sio.get_session(other_sid)
-        user = await UserTable.query_by_id(other_session["user_id"])
+    player = record.to_player()
 
-        if not user:
-            continue
+    logger.info(f"User {sid} joined {room_key} on {namespace}\n{player}")
 
-        other_player = Player(
-            user=await User.from_table(user),
-            x=other_session["x"],
-            y=other_session["y"],
-            action=other_session["action"],
+    # players connected to other workers are only known to the shared roster
+    shared = await RoomEntity.get_players(
+        room_id=state.room_id, instance=state.instance
+    )
+    remote = [other for other_sid, other in shared.items() if other_sid not in state]
+    if remote:
+        packet = encode_packet(
+            "room:join",
+            RoomJoinResponse(
+                room_id=state.room_id,
+                players=[*state.roster(), *remote],
+                waddles=[],
+            ),
         )
-        players.append(other_player)
+    else:
+        packet = state.derive(encode_room_join)
 
-    await send_packet(
-        sid,
-        "room:join",
-        RoomJoinResponse(
-            room_id=int(room_key.split(":")[-1]),
-            players=players,
-            waddles=[],
-        ),
-        namespace=namespace,
-    )
+    await send_encoded(sid, packet, namespace=namespace)
 
     await send_packet(
         room_key,
@@ -183,7 +336,7 @@ async def on_room_leave(event: Event) -> None:
     logger.info(f"User {sid} left {room_key} on {namespace}")
 
     session = await sio.get_session(sid)
-    user = await UserTable.query_by_id(session["user_id"])
+    user = await UserEntity.get_user(session["user_id"])
 
     if not user:
         return
@@ -208,22 +361,24 @@ async def on_room_leave(event: Event) -> None:
 async def on_user_disconnect(event: Event) -> None:
     _, (sid, session, rooms) = event
 
-    user = await UserTable.query_by_id(session["user_id"])
-    if rooms is not None and user:
-        for room_key in filter(lambda k: k.startswith("rooms:"), rooms):
-            player = Player(
-                user=await User.from_table(user),
-                x=0,
-                y=0,
-                action=DEFAULT_ACTION,
-            )
-
-            await send_packet(
-                room_key,
-                "player:remove",
-                player,
-                skip_sid=sid,
-                namespace=DEFAULT_WORLD_NAMESPACE,
-            )
+    location = player_locations.remove(sid, namespace=DEFAULT_WORLD_NAMESPACE)
+    room_keys = [location.room_key] if location and location.room_key else []
+    for room_key in room_keys:
+        area_of_interest.remove(room_key, sid, namespace=DEFAULT_WORLD_NAMESPACE)
+        record = room_states.leave(room_key, sid, namespace=DEFAULT_WORLD_NAMESPACE)
+        if record is None:
+            continue
+
+        room_id, instance = parse_room_key(room_key)
+        await RoomEntity.remove_player(
+            sid, record.user.id, room_id=room_id, instance=instance
+        )
+        player = Player(user=record.user, x=0, y=0, action=DEFAULT_ACTION)
+        await send_encoded(
+            room_key,
+            encode_packet("player:remove", player),
+            skip_sid=sid,
+            namespace=DEFAULT_WORLD_NAMESPACE,
+        )
 
     logger.info(f"Disconnected user {sid} ({session}) with rooms {rooms}")
@@ -2,12 +2,14 @@ from typing import Annotated
 from fastapi import Depends
 from loguru import logger
 from pydantic import BaseModel
-from sqlalchemy import update
 
+from frostbite.core.avatar_store import avatar_store
+from frostbite.core.catalog import get_catalog
+from frostbite.core.constants.item import ItemType
+from frostbite.core.room_state import room_states
 from frostbite.core.socket import SocketException, send_packet
-from frostbite.database import ASYNC_SESSION
-from frostbite.database.schema.avatar import AvatarTable
-from frostbite.database.schema.user import UserTable
+from frostbite.database.schema.user import UserRow
+from frostbite.entities.room import RoomEntity
 from frostbite.handlers import get_current_user, packet_handlers
 from frostbite.handlers.room import get_current_room
 from frostbite.models.avatar import Avatar
@@ -31,7 +33,7 @@ class AvatarMask(BaseModel):
 async def handle_player_action(
     sid: str,
     packet: Packet[AvatarMask],
-    user: Annotated[UserTable, Depends(get_current_user)],
+    user: Annotated[UserRow, Depends(get_current_user)],
     namespace: str,
 ) -> None:
     current_avatar = (await Avatar.from_table(user.avatar)).model_dump()
@@ -50,30 +52,38 @@ async def handle_player_action(
         logger.info(f"Avatar has not changed\n{current_avatar}\n{new_avatar}")
         return
 
-    async with ASYNC_SESSION() as session:
-        await session.execute(
-            update(AvatarTable).values(fields).where(AvatarTable.id == user.avatar.id)
-        )
-        await session.commit()
+    catalog = get_catalog()
+    for field, value in fields.items():
+        # every slot but the colour may be left empty
+        if value == 0 and field != "color":
+            continue
+        if not catalog.has_item(value, ItemType[field.upper()]):
+            logger.warning(f"Invalid {field} item {value}")
+            return
+
+    await avatar_store.update(user, fields)
 
     try:
         room = get_current_room(sid, namespace=namespace)
+        public_user = await User.from_table(user)
 
-        current_user = await UserTable.query_by_id(user.id)
-        if current_user is None:
-            logger.error("User not found", user.id)
-            return
+        state = room_states.get(room, namespace=namespace)
+        if state is not None:
+            state.set_user(sid, public_user)
+            await RoomEntity.update_user(
+                sid, public_user, room_id=state.room_id, instance=state.instance
+            )
 
         await send_packet(
             sid,
             "user:update",
-            await MyUser.from_table(current_user),
+            await MyUser.from_table(user),
             namespace=namespace,
         )
         await send_packet(
             room,
             "user:update",
-            await User.from_table(current_user),
+            public_user,
             skip_sid=sid,
             namespace=namespace,
         )
@@ -3,7 +3,7 @@ from fastapi import Depends
 from pydantic import BaseModel
 
 from frostbite.core.socket import send_packet
-from frostbite.database.schema.user import UserTable
+from frostbite.database.schema.user import UserRow
 from frostbite.handlers import get_current_user, packet_handlers
 from frostbite.handlers.room import get_current_room
 from frostbite.models.packet import Packet
@@ -29,7 +29,7 @@ class WaddleLeaveResponse(BaseModel):
 @packet_handlers.register("waddle:join")
 async def handle_waddle_join(
     packet: Packet[WaddleJoinData],
-    user: Annotated[UserTable, Depends(get_current_user)],
+    user: Annotated[UserRow, Depends(get_current_user)],
     room_key: Annotated[str, Depends(get_current_room)],
     namespace: str,
 ):
@@ -47,7 +47,7 @@ async def handle_waddle_join(
 @packet_handlers.register("waddle:leave")
 async def handle_waddle_leave(
     packet: Packet[WaddleLeaveData],
-    user: Annotated[UserTable, Depends(get_current_user)],
+    user: Annotated[UserRow, Depends(get_current_user)],
     room_key: Annotated[str, Depends(get_current_room)],
     namespace: str,
 ):
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from pydantic import BaseModel
 
-from frostbite.database.schema.avatar import AvatarTable
+from frostbite.database.schema.avatar import AvatarRow, AvatarTable
 
 
 class Avatar(BaseModel):
@@ -18,7 +18,7 @@ class Avatar(BaseModel):
     transformation: str | None
 
     @classmethod
-    async def from_table(cls, avatar: AvatarTable) -> "Avatar":
+    async def from_table(cls, avatar: AvatarTable | AvatarRow) -> "Avatar":
         return cls(
             color=avatar.color,
             head=avatar.head,
@@ -4,6 +4,12 @@ from frostbite.models.action import Action
 from frostbite.models.user import MyUser, User
 
 
+class PlayerState(BaseModel):
+    x: float
+    y: float
+    action: Action
+
+
 class Player(BaseModel):
     user: User | MyUser
     x: float
@@ -1,7 +1,7 @@
 from pydantic import BaseModel
 
 from frostbite.database import ASYNC_SESSION
-from frostbite.database.schema.user import UserTable
+from frostbite.database.schema.user import UserRow, UserTable
 from frostbite.models.avatar import Avatar
 from frostbite.models.presence import Presence
 from frostbite.models.relationship import Relationship
@@ -24,7 +24,7 @@ class User(BaseUser):
     presence: Presence | None
 
     @classmethod
-    async def from_table(cls, user: UserTable) -> "User":
+    async def from_table(cls, user: UserTable | UserRow) -> "User":
         return cls(
             id=user.id,
             username=user.username,
@@ -45,7 +45,7 @@ class MyUser(BaseUser):
     is_stealth: bool
 
     @classmethod
-    async def from_table(cls, user: UserTable) -> "MyUser":
+    async def from_table(cls, user: UserTable | UserRow) -> "MyUser":
         return cls(
             id=user.id,
             username=user.username,
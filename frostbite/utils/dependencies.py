@@ -1,5 +1,6 @@
 from contextlib import AsyncExitStack
 from dataclasses import dataclass
+from enum import Enum, auto
 from typing import Any, Callable, cast
 
 from fastapi.background import BackgroundTasks
@@ -88,3 +89,112 @@ async def solve_dependencies(
         background_tasks=background_tasks,
         dependency_cache=dependency_cache,
     )
+
+
+def inline_dependency[T: Callable[..., Any]](func: T) -> T:
+    """Mark a sync dependency as cheap and non-blocking.
+
+    Compiled plans run inline dependencies directly on the event loop instead
+    of dispatching them to the threadpool.
+    """
+    setattr(func, "__inline_dependency__", True)
+    return func
+
+
+class CallKind(Enum):
+    INLINE = auto()
+    SYNC = auto()
+    COROUTINE = auto()
+    GENERATOR = auto()
+
+
+def get_call_kind(call: Callable[..., Any]) -> CallKind:
+    if is_gen_callable(call) or is_async_gen_callable(call):
+        return CallKind.GENERATOR
+    elif is_coroutine_callable(call):
+        return CallKind.COROUTINE
+    elif getattr(call, "__inline_dependency__", False):
+        return CallKind.INLINE
+
+    return CallKind.SYNC
+
+
+@dataclass(frozen=True, slots=True)
+class PlanStep:
+    call: Callable[..., Any]
+    kind: CallKind
+    arguments: tuple[tuple[str, int], ...]
+
+
+@dataclass(frozen=True, slots=True)
+class DependencyPlan:
+    """A dependant tree flattened into topologically ordered steps.
+
+    Every step only refers to the results of earlier steps, so executing a
+    plan is a single loop over `steps`. `arguments` maps the parameters of the
+    root call to the step that produces their value.
+    """
+
+    steps: tuple[PlanStep, ...]
+    arguments: tuple[tuple[str, int], ...]
+
+
+def compile_dependencies(dependant: Dependant) -> DependencyPlan:
+    """Compile a dependant into a `DependencyPlan`.
+
+    Sub-dependencies sharing a cache key are compiled once and reused, matching
+    the `use_cache` semantics of `solve_dependencies`.
+    """
+    steps: list[PlanStep] = []
+    cached: dict[tuple[Callable[..., Any], tuple[str]], int] = {}
+
+    def _compile(current: Dependant) -> tuple[tuple[str, int], ...]:
+        arguments: list[tuple[str, int]] = []
+        for sub_dependant in current.dependencies:
+            cache_key = cast(
+                tuple[Callable[..., Any], tuple[str]], sub_dependant.cache_key
+            )
+            if sub_dependant.use_cache and cache_key in cached:
+                index = cached[cache_key]
+            else:
+                call = cast(Callable[..., Any], sub_dependant.call)
+                sub_arguments = _compile(sub_dependant)
+                index = len(steps)
+                steps.append(
+                    PlanStep(
+                        call=call, kind=get_call_kind(call), arguments=sub_arguments
+                    )
+                )
+                cached.setdefault(cache_key, index)
+
+            if sub_dependant.name is not None:
+                arguments.append((sub_dependant.name, index))
+
+        return tuple(arguments)
+
+    arguments = _compile(dependant)
+    return DependencyPlan(steps=tuple(steps), arguments=arguments)
+
+
+async def execute_plan(
+    plan: DependencyPlan, *, async_exit_stack: AsyncExitStack
+) -> dict[str, Any]:
+    """Run a compiled plan and return the keyword arguments for its root call."""
+    results: list[Any] = []
+    for step in plan.steps:
+        values = {name: results[index] for name, index in step.arguments}
+
+        if step.kind is CallKind.INLINE:
+            solved = step.call(**values)
+        elif step.kind is CallKind.COROUTINE:
+            solved = await step.call(**values)
+        elif step.kind is CallKind.GENERATOR:
+            solved = await solve_generator(
+                call=step.call, stack=async_exit_stack, sub_values=values
+            )
+        else:
+            solved = await run_in_threadpool(step.call, **values)
+
+        results.append(solved)
+
+    return {name: results[index] for name, index in plan.arguments}
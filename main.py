@@ -4,6 +4,7 @@ import sentry_sdk
 import socketio
 from fastapi import FastAPI
 from fastapi.exceptions import RequestValidationError
+from fastapi.responses import PlainTextResponse
 from fastapi_events.handlers.local import local_handler
 from fastapi_events.middleware import EventHandlerASGIMiddleware
 from loguru import logger
@@ -21,11 +22,15 @@ from frostbite.core.config import (
     API_VERSION,
     DEBUG,
     FASTAPI_EVENTS_MIDDLEWARE_ID,
+    METRICS_ENABLED,
+    METRICS_PATH,
     WORLD_ID,
     SENTRY_DSN,
 )
 from frostbite.core.socket import sio
 from frostbite.core.lifespan import manage_app_lifespan
+from frostbite.core.cache import local_caches
+from frostbite.core.metrics import packet_metrics
 from frostbite.utils.routes import get_modules
 
 print(
@@ -128,6 +133,13 @@ async def trigger_error_error():
     division_by_zero = 1 / 0
 
 
+if METRICS_ENABLED:
+
+    @app.get(METRICS_PATH, response_class=PlainTextResponse)
+    async def scrape_metrics() -> str:
+        return packet_metrics.render_prometheus() + local_caches.render_prometheus()
+
+
 app = socketio.ASGIApp(sio, other_asgi_app=app)
 
 